@@ -15,6 +15,9 @@ import os
 import logging
 from functions import *
 
+# Log to the console and to debug.log
+setup_logging()
+
 # Migration
 # usage of a created instance of the API class
 # ### V1.0
@@ -23,6 +26,12 @@ pythonClient.connect_to_opensilex_ws(
     identifier="admin@opensilex.org", password="admin", host="http://localhost:8666/rest")
 logging.info("Headers and token : " + str(pythonClient.default_headers) + '\n')
 
+# For imports with max_workers > 1, use a pool of clients instead
+# pythonClient = ClientPool(pythonClient, size=4, timeout=(5, 60))
+
+# Renew the token in the background for imports that last for hours
+# session = SessionManager(pythonClient, identifier="admin@opensilex.org", password="admin").start()
+
 # Functions
 
 # Import variable from csv and googlesheet
@@ -0,0 +1,85 @@
+"""Benchmark of the time taken to import the functions package
+
+Each measure runs in a new interpreter so nothing is already imported.
+Exits with an error when the import takes longer than the threshold or
+when it imports one of the heavy libraries that should be loaded lazily.
+
+Usage : python benchmarks/bench_import_time.py [--runs 10] [--threshold 0.1]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Libraries that importing the package alone must not load
+lazy_modules = ["pandas", "dateparser", "pydantic", "opensilexClientToolsPython"]
+
+measure_code = """
+import json, sys, time
+start = time.perf_counter()
+import functions
+{extra}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "loaded": [m for m in {lazy_modules!r} if m in sys.modules]
+}}))
+"""
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(extra="", runs=10):
+    """Import the package runs times, return the timings and loaded modules"""
+    code = measure_code.format(extra=extra, lazy_modules=lazy_modules)
+    timings = []
+    loaded = set()
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", code], cwd=repo_dir, check=True,
+            capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.splitlines()[-1])
+        timings.append(result["seconds"])
+        loaded.update(result["loaded"])
+    return timings, sorted(loaded)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument(
+        "--threshold", type=float, default=0.1,
+        help="maximum median time in seconds of 'import functions'"
+    )
+    args = parser.parse_args()
+
+    timings, loaded = measure(runs=args.runs)
+    median = statistics.median(timings)
+    print("import functions : median {:.1f} ms, min {:.1f} ms".format(
+        1000 * median, 1000 * min(timings)
+    ))
+
+    # For reference, the cost of the first use of the data import
+    first_use, _ = measure(extra="functions.add_data_from_csv", runs=args.runs)
+    print("import functions + first use of add_data_from_csv : median {:.1f} ms".format(
+        1000 * statistics.median(first_use)
+    ))
+
+    failed = False
+    if loaded:
+        print("FAIL : importing the package loaded " + ", ".join(loaded))
+        failed = True
+    if median > args.threshold:
+        print("FAIL : median import time above {:.1f} ms".format(1000 * args.threshold))
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""Throughput benchmarks of the imports and exports against a mock server
+
+Runs add_data_from, export_data, create_update_objects, migrate_variables
+and get_variables at several data sizes against benchmarks/mock_server.py,
+then the objects and variables imports again with a plan and the
+variables in update mode, and reports for each run the rows per second, the requests received by
+the server and the peak memory allocated by Python (tracemalloc).
+
+Requires opensilexClientToolsPython, like the functions package.
+
+Usage : python benchmarks/bench_imports.py [--sizes 100,1000] [--latency 0.005]
+        [--error-rate 0] [--workers 1] [--json results.json]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_dir)
+
+import opensilexClientToolsPython
+import pandas as pd
+
+import functions
+from mock_server import MockOpensilexServer
+
+experiment_uri = "mock:experiment/0"
+provenance_uri = "mock:provenance/0"
+
+
+def data_frame(n_rows, n_objects=100, n_variables=10):
+    """Return n_rows observations in the layout expected by add_data_from"""
+    index = pd.RangeIndex(n_rows)
+    return pd.DataFrame({
+        "date": pd.Timestamp("2021-06-01T00:00:00+02:00")
+            + pd.to_timedelta(index, unit="min"),
+        "objectURI": "mock:scientific_object/" + (index % n_objects).astype(str),
+        "variable_uri": "mock:variable/" + (index % n_variables).astype(str),
+        "value": index * 0.5,
+        "provenanceURI": provenance_uri,
+        "experimentURI": experiment_uri,
+    }).assign(date=lambda df: df["date"].dt.strftime("%Y-%m-%dT%H:%M:%S%z"))
+
+
+def objects_frame(n_objects):
+    """Return n_objects scientific objects as expected by create_update_objects"""
+    index = pd.RangeIndex(n_objects).astype(str)
+    return pd.DataFrame({
+        "uri": "mock:scientific_object/" + index,
+        "type": "vocabulary:Plot",
+        "name": "plot " + index,
+        "experimentUri": experiment_uri,
+    })
+
+
+def variables_frame(n_variables, n_components=None):
+    """Return n_variables variables in the default variables schema"""
+    n_components = n_components or max(1, n_variables // 10)
+    rows = []
+    for i in range(n_variables):
+        row = {
+            "trait.uri": None, "trait.label": None,
+            "variable.uri": None, "variable.label": "variable {}".format(i),
+            "variable.description": None, "variable.datatype": "decimal",
+            "variable.alternative_name": None, "variable.timeinterval": None,
+            "variable.sampleinterval": None,
+        }
+        for j, kind in enumerate(["entity", "characteristic", "method", "unit"]):
+            component = (i * (j + 1)) % n_components
+            row[kind + ".uri"] = None
+            row[kind + ".label"] = "{} {}".format(kind, component)
+            row[kind + ".comment"] = None
+        rows.append(row)
+    df = pd.DataFrame(rows)
+    return df.where(pd.notnull(df), None)
+
+
+def measure(server, name, rows, func):
+    """Run func once and return its throughput, requests and memory"""
+    server.reset_stats()
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    stats = server.stats()
+    result = {
+        "benchmark": name,
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "rows_per_s": round(rows / seconds, 1),
+        "requests": stats["requests"],
+        "errors": sum(stats["errors"].values()),
+        "peak_mib": round(peak / 2 ** 20, 2),
+        "by_endpoint": stats["by_endpoint"],
+    }
+    print("{benchmark:<24}{rows:>9}{seconds:>10.2f}{rows_per_s:>12.1f}"
+          "{requests:>10}{errors:>8}{peak_mib:>10.1f}".format(**result))
+    return result
+
+
+def run(sizes, latency, error_rate, workers, batch_size):
+    results = []
+    print("{:<24}{:>9}{:>10}{:>12}{:>10}{:>8}{:>10}".format(
+        "benchmark", "rows", "seconds", "rows/s", "requests", "errors", "peak MiB"
+    ))
+    with MockOpensilexServer(latency=latency, error_rate=error_rate) as server:
+        if workers > 1:
+            client = functions.ClientPool.connect(
+                "admin@opensilex.org", "admin", server.url, size=workers
+            )
+        else:
+            client = opensilexClientToolsPython.ApiClient()
+            client.connect_to_opensilex_ws(
+                identifier="admin@opensilex.org", password="admin", host=server.url
+            )
+
+        for size in sizes:
+            # Observations are much more numerous than the other objects
+            data = data_frame(10 * size)
+            results.append(measure(
+                server, "add_data_from", len(data),
+                lambda: functions.add_data_from(
+                    client, data, batch_size=batch_size, max_workers=workers
+                )
+            ))
+
+            # Export what was just imported
+            export_path = "data_export.csv"
+            results.append(measure(
+                server, "export_data", len(data),
+                lambda: functions.export_data(
+                    client, export_path, experiments=experiment_uri,
+                    page_size=batch_size, max_workers=workers,
+                    variable_names=False
+                )
+            ))
+
+            server.reset()
+            objects = objects_frame(size)
+            results.append(measure(
+                server, "create_update_objects", len(objects),
+                lambda: functions.create_update_objects(
+                    client, objects, False, max_workers=workers
+                )
+            ))
+
+            # Planned run over objects that all exist already
+            results.append(measure(
+                server, "planned objects rerun", len(objects),
+                lambda: functions.create_update_objects(
+                    client, objects, False, max_workers=workers,
+                    plan=functions.plan_objects(client, objects, False)
+                )
+            ))
+
+            server.reset()
+            variables = variables_frame(size)
+            results.append(measure(
+                server, "migrate_variables", len(variables),
+                lambda: functions.migrate_variables(client, variables)
+            ))
+
+            results.append(measure(
+                server, "planned variables rerun", len(variables),
+                lambda: functions.migrate_variables(
+                    client, variables,
+                    plan=functions.plan_variables(client, variables)
+                )
+            ))
+
+            # Sync of the same catalogue where ten descriptions changed
+            variables.loc[:9, "variable.description"] = "changed"
+            results.append(measure(
+                server, "variables sync", len(variables),
+                lambda: functions.migrate_variables(client, variables, update=True)
+            ))
+
+            server.reset()
+            server.add_variable_catalogue(size)
+            results.append(measure(
+                server, "get_variables", size,
+                lambda: functions.get_variables(
+                    client, csv_path="variables_export.csv", return_df=False
+                )
+            ))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000",
+                        help="comma separated numbers of objects and variables, "
+                        "the data benchmark sends ten times more rows")
+    parser.add_argument("--latency", type=float, default=0.005,
+                        help="seconds added by the server to each request")
+    parser.add_argument("--error-rate", type=float, default=0,
+                        help="share of the requests answered with 503")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="max_workers of the imports, a ClientPool is used above 1")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    # The messages logged for each row aren't what is measured here
+    logging.disable(logging.CRITICAL)
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    # The imports write their outcome files in the working directory
+    json_path = os.path.abspath(args.json) if args.json else None
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        results = run(
+            sizes, args.latency, args.error_rate, args.workers, args.batch_size
+        )
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark of the per-row cost of pydantic validation
+
+Times create_base_variable, is_empty and format_comment as they are
+called now and wrapped in validate_arguments as they used to be. The
+rows are all found in a prefilled VariablesLookupCache so no request is
+sent and only the local cost is measured.
+
+Usage : python benchmarks/bench_validation.py [--rows 2000]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import opensilexClientToolsPython
+import pandas as pd
+from pydantic import validate_arguments
+
+import functions
+
+
+def validated(func):
+    """Wrap a function like it was before, with pydantic validation"""
+    return validate_arguments(config=dict(arbitrary_types_allowed=True))(func)
+
+
+def make_cache(python_client, rows):
+    """Return a lookup cache already holding an entity for every row"""
+    cache = functions.VariablesLookupCache(python_client)
+    cache.by_uri["entity"] = {}
+    cache.by_name["entity"] = {}
+    for row in rows:
+        cache._index("entity", {
+            "uri": row["uri"], "name": row["name"], "description": None
+        })
+    return cache
+
+
+def per_call(func, args_list, repeat=3):
+    """Return the best time per call in microseconds"""
+    def run():
+        for args in args_list:
+            func(*args)
+    best = min(timeit.repeat(run, number=1, repeat=repeat))
+    return 1e6 * best / len(args_list)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    # The messages logged for each row aren't what is measured here
+    logging.disable(logging.CRITICAL)
+
+    python_client = opensilexClientToolsPython.ApiClient()
+    rows = [
+        pd.Series({
+            "uri": "test:entity/{}".format(i),
+            "name": "entity {}".format(i),
+            "description": "comment {}".format(i)
+        })
+        for i in range(args.rows)
+    ]
+    cache = make_cache(python_client, rows)
+
+    cases = [
+        (
+            "create_base_variable", functions.create_base_variable,
+            [(python_client, row, i, "entity", cache) for i, row in enumerate(rows)]
+        ),
+        ("is_empty", functions.is_empty, [(row["description"],) for row in rows]),
+        ("format_comment", functions.format_comment, [(row["description"],) for row in rows]),
+    ]
+
+    print("{:<22}{:>14}{:>14}{:>14}".format(
+        "function", "validated us", "fast us", "saved us"
+    ))
+    for name, func, args_list in cases:
+        slow = per_call(validated(func), args_list)
+        fast = per_call(func, args_list)
+        print("{:<22}{:>14.1f}{:>14.1f}{:>14.1f}".format(name, slow, fast, slow - fast))
+
+
+if __name__ == "__main__":
+    main()
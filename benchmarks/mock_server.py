@@ -0,0 +1,385 @@
+"""Local stand-in for the Opensilex REST api, for the benchmarks
+
+Only the endpoints used by the functions package are served, with the
+same paths and the same response envelope ({"metadata": ..., "result":
+...}) as Opensilex. Everything is kept in memory. Each request can be
+delayed to simulate the network and the server, and a share of the
+requests can be answered with an error to check how the imports behave.
+
+Usage as a script : python benchmarks/mock_server.py [--port 8666] [--latency 0.02]
+"""
+
+import argparse
+import base64
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+# Components of the variables and the path of their endpoints
+variable_kinds = {
+    "entities": "entity",
+    "characteristics": "characteristic",
+    "methods": "method",
+    "units": "unit",
+    "variables": "variable",
+}
+
+datatypes = [
+    {"uri": "http://www.w3.org/2001/XMLSchema#" + name, "name": "datatypes." + name}
+    for name in ["boolean", "date", "dateTime", "decimal", "integer", "string"]
+]
+
+
+def make_token(lifetime=3600):
+    """Return a JWT shaped token expiring after lifetime seconds"""
+    def encode(part):
+        return base64.urlsafe_b64encode(json.dumps(part).encode()).decode().rstrip("=")
+    return ".".join([
+        encode({"alg": "none", "typ": "JWT"}),
+        encode({"sub": "admin", "exp": int(time.time() + lifetime)}),
+        "signature",
+    ])
+
+
+def parse_date(date):
+    """Parse an ISO 8601 date, with a Z or an offset without colon too,
+    the dates without timezone being in UTC"""
+    date = re.sub(r"Z$", "+00:00", date)
+    date = re.sub(r"([+-]\d{2})(\d{2})$", r"\1:\2", date)
+    parsed = datetime.fromisoformat(date)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class MockOpensilexServer:
+    """In-memory Opensilex api served on a local port
+
+    Parameters
+    ----------
+    port: int = 0
+        The port to listen on, a free one by default
+    latency: float = 0
+        Seconds each request waits before being answered
+    error_rate: float = 0
+        Share of the requests answered with error_status
+    error_status: int = 503
+        The status of the injected errors
+    token_lifetime: float = 3600
+        Seconds before the tokens given by /security/authenticate expire,
+        after which the requests using them get 401
+    seed: int = 0
+        Seed of the error injection, so runs are comparable
+    """
+
+    def __init__(
+        self, port=0, latency=0, error_rate=0, error_status=503,
+        token_lifetime=3600, seed=0
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.token_lifetime = token_lifetime
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.tokens = {}
+        self.reset()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        """The host to give to connect_to_opensilex_ws"""
+        return "http://127.0.0.1:{}/rest".format(self.httpd.server_port)
+
+    def reset(self):
+        """Forget all the stored objects and the statistics"""
+        with self.lock:
+            self.objects = {kind: {} for kind in variable_kinds.values()}
+            self.scientific_objects = {}
+            self.provenances = {}
+            self.data = []
+            self.reset_stats()
+
+    def reset_stats(self):
+        """Reset the request counters"""
+        self.requests = Counter()
+        self.errors = Counter()
+        self.bytes_received = 0
+        self.bytes_sent = 0
+
+    def stats(self):
+        """Return the requests served since the last reset, by endpoint"""
+        with self.lock:
+            return {
+                "requests": sum(self.requests.values()),
+                "by_endpoint": dict(self.requests),
+                "errors": dict(self.errors),
+                "bytes_received": self.bytes_received,
+                "bytes_sent": self.bytes_sent,
+            }
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # Preloading, so the export and lookup benchmarks have something to read
+
+    def add_variable_catalogue(self, n_variables, n_components=None):
+        """Store n_variables variables sharing n_components of each kind"""
+        n_components = n_components or max(1, n_variables // 10)
+        with self.lock:
+            for kind in ["entity", "characteristic", "method", "unit"]:
+                for i in range(n_components):
+                    uri = "mock:{}/{}".format(kind, i)
+                    self.objects[kind][uri] = {
+                        "uri": uri, "name": "{} {}".format(kind, i),
+                        "description": None
+                    }
+            for i in range(n_variables):
+                uri = "mock:variable/{}".format(i)
+                components = {
+                    kind: "mock:{}/{}".format(kind, (i * (j + 1)) % n_components)
+                    for j, kind in enumerate(["entity", "characteristic", "method", "unit"])
+                }
+                self.objects["variable"][uri] = dict(
+                    uri=uri, name="variable {}".format(i), description=None,
+                    datatype=datatypes[3]["uri"], **components
+                )
+
+    # Endpoints
+
+    def route(self, method, path, query, body):
+        """Return the status and the result of a request"""
+        if path == "/security/authenticate" and method == "POST":
+            token = make_token(self.token_lifetime)
+            self.tokens[token] = time.time() + self.token_lifetime
+            return 200, {"token": token}
+
+        if path == "/core/data" and method == "POST":
+            invalid = [d for d in body if not d.get("date") or not d.get("variable")]
+            if invalid:
+                return 400, "Invalid data : {}".format(invalid[0])
+            with self.lock:
+                first = len(self.data)
+                uris = ["mock:data/{}".format(first + i) for i in range(len(body))]
+                self.data.extend(dict(d, uri=uri) for d, uri in zip(body, uris))
+            return 201, uris
+
+        if path == "/core/data" and method == "GET":
+            return 200, self._search_data(query)
+
+        if path == "/core/provenances" and method == "POST":
+            return self._create(self.provenances, body, "provenance")
+
+        if path == "/core/scientific_objects":
+            if method == "GET":
+                page = int(query.get("page", 0))
+                page_size = int(query.get("page_size", 20))
+                with self.lock:
+                    found = [
+                        o for o in self.scientific_objects.values()
+                        if not query.get("experiment")
+                        or o.get("experiment") == query["experiment"]
+                    ]
+                return 200, found[page * page_size:(page + 1) * page_size]
+            if method == "POST":
+                return self._create(self.scientific_objects, body, "scientific_object")
+            if method == "PUT":
+                with self.lock:
+                    if body.get("uri") not in self.scientific_objects:
+                        return 404, "Scientific object not found"
+                    self.scientific_objects[body["uri"]].update(body)
+                return 200, [body["uri"]]
+
+        if path == "/core/variables/datatypes" and method == "GET":
+            return 200, datatypes
+
+        if path == "/core/variables/details" and method == "GET":
+            variables = self._search("variable", query)
+            return 200, [self._variable_details(v) for v in variables]
+
+        match = re.match(r"^/core/(\w+)(?:/(.+))?$", path)
+        if match and match.group(1) in variable_kinds:
+            kind = variable_kinds[match.group(1)]
+            if match.group(2):
+                uri = unquote(match.group(2))
+                obj = self.objects[kind].get(uri)
+                if method == "GET" and obj is not None:
+                    return 200, obj
+                return 404, "Object not found : " + uri
+            if method == "GET":
+                return 200, self._search(kind, query)
+            if method == "POST":
+                return self._create(self.objects[kind], body, kind)
+            if method == "PUT":
+                with self.lock:
+                    if body.get("uri") not in self.objects[kind]:
+                        return 404, "Object not found : {}".format(body.get("uri"))
+                    self.objects[kind][body["uri"]].update(body)
+                return 200, [body["uri"]]
+
+        return 404, "No mock for {} {}".format(method, path)
+
+    def _create(self, store, body, kind):
+        with self.lock:
+            uri = body.get("uri") or "mock:{}/{}".format(kind, len(store))
+            if uri in store:
+                return 409, "URI already exists : " + uri
+            store[uri] = dict(body, uri=uri)
+        return 201, [uri]
+
+    def _search(self, kind, query):
+        page = int(query.get("page", 0))
+        page_size = int(query.get("page_size", 20))
+        with self.lock:
+            found = list(self.objects[kind].values())
+        if query.get("name"):
+            pattern = re.compile(query["name"], re.IGNORECASE)
+            found = [o for o in found if pattern.search(o.get("name") or "")]
+        return found[page * page_size:(page + 1) * page_size]
+
+    def _search_data(self, query):
+        def values(key):
+            value = query.get(key)
+            return None if value is None else [value] if isinstance(value, str) else value
+
+        experiments, variables = values("experiments"), values("variables")
+        objects = values("scientific_objects")
+        start = query.get("start_date")
+        end = query.get("end_date")
+        page = int(query.get("page", 0))
+        page_size = int(query.get("page_size", 20))
+        with self.lock:
+            found = [
+                d for d in self.data
+                if (experiments is None or set(experiments) & set(
+                    (d.get("provenance") or {}).get("experiments") or []
+                ))
+                and (variables is None or d.get("variable") in variables)
+                and (objects is None or set(objects) & set(d.get("scientific_objects") or []))
+                and (start is None or parse_date(d["date"]) >= parse_date(start))
+                and (end is None or parse_date(d["date"]) <= parse_date(end))
+            ]
+        return found[page * page_size:(page + 1) * page_size]
+
+    def _variable_details(self, variable):
+        details = dict(variable)
+        for kind in ["entity", "characteristic", "method", "unit"]:
+            component = self.objects[kind].get(variable.get(kind))
+            details[kind] = (
+                None if component is None
+                else {"uri": component["uri"], "name": component["name"]}
+            )
+        return details
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self):
+                url = urlsplit(self.path)
+                path = re.sub(r"^/rest", "", url.path)
+                # Repeated parameters are lists, like the filters of the searches
+                query = {
+                    k: v[0] if len(v) == 1 else v
+                    for k, v in parse_qs(url.query).items()
+                }
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                # The uris in the paths are grouped to count by endpoint
+                endpoint = "{} {}".format(self.command, re.sub(
+                    r"^(/core/\w+)/(?!details$|datatypes$).+$", r"\1/{uri}", path
+                ))
+
+                if server.latency:
+                    time.sleep(server.latency)
+
+                with server.lock:
+                    server.requests[endpoint] += 1
+                    server.bytes_received += len(raw)
+                    inject = server.error_rate and server.random.random() < server.error_rate
+
+                token = (self.headers.get("Authorization") or "").split()[-1:]
+                if inject:
+                    status, result = server.error_status, "Injected error"
+                elif path != "/security/authenticate" and (
+                    not token or server.tokens.get(token[0], 0) < time.time()
+                ):
+                    status, result = 401, "Invalid or expired token"
+                else:
+                    try:
+                        body = json.loads(raw) if raw else None
+                        status, result = server.route(self.command, path, query, body)
+                    except Exception as e:
+                        status, result = 500, repr(e)
+
+                if status >= 400:
+                    with server.lock:
+                        server.errors[endpoint] += 1
+                    payload = {"result": {"title": "ERROR", "message": result}}
+                else:
+                    payload = {
+                        "metadata": {"pagination": {
+                            "pageSize": int(query.get("page_size", 20)),
+                            "currentPage": int(query.get("page", 0)),
+                        }, "status": [], "datafiles": []},
+                        "result": result
+                    }
+                encoded = json.dumps(payload).encode()
+                with server.lock:
+                    server.bytes_sent += len(encoded)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(encoded)))
+                self.end_headers()
+                self.wfile.write(encoded)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _serve
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8666)
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--variables", type=int, default=0,
+                        help="number of variables to preload")
+    args = parser.parse_args()
+
+    server = MockOpensilexServer(
+        port=args.port, latency=args.latency, error_rate=args.error_rate
+    )
+    server.add_variable_catalogue(args.variables)
+    print("Mock Opensilex api on " + server.url)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print(json.dumps(server.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+'''
+File: functions/__init__.py
+Project: opensilex-ws-python-client
+Created Date: 01 May 2021
+Author: Arnaud Charleroy
+-----
+Last Modified: Thu Sep 09 2021
+Modified By: Gabriel Besombes
+-----
+HISTORY:
+Date      	By	Comments
+----------	---	---------------------------------------------------------
+'''
+
+"""Custom functions for data imports
+
+The functions are split in submodules :
+    * `variables` - import and export of variables and their components
+    * `objects` - creation and update of scientific objects
+    * `data` - import and export of data
+    * `experiments` - creation of experiments, sensors and provenances
+    * `users` - creation of users
+    * `clients`, `sheets`, `files`, `journal`, `ledger`,
+      `instrumentation`, `plans`, `schemas`, `utils` - what the imports
+      have in common
+
+All the public names can be used directly from the package, e.g.
+`functions.add_data_from_csv` or `from functions import add_data_from_csv`.
+A submodule, and the libraries it needs (pandas, pydantic, dateparser, the
+opensilex client...), are only imported when one of its names is first
+used, so importing the package itself is quick.
+
+Nothing is logged unless the logging is configured, see setup_logging.
+
+This package requires that the following packages be installed within
+the Python environment you are running it in :
+    * `opensilexClientToolsPython`
+    * `requests`
+    * `pandas`
+    * `dateparser`
+    * `pydantic`
+
+`pyarrow` is also needed to import Parquet and Arrow IPC files.
+"""
+
+import importlib
+import logging
+
+# Public names of each submodule
+_submodules = {
+    "schemas": ["DEFAULT_VARIABLES_SCHEMA", "full_schema", "VariablesSchema"],
+    "clients": ["ClientPool", "PythonClient", "SessionManager", "token_expiration"],
+    "experiments": ["create_experiment", "create_sensor", "create_provenances"],
+    "utils": [
+        "is_empty", "format_comment", "map_bounded", "page_count", "is_last_page"
+    ],
+    "ledger": ["OutcomeLedger"],
+    "instrumentation": ["MetricsRegistry", "metrics", "api_method_name", "payload_size"],
+    "journal": ["ImportJournal"],
+    "plans": ["ImportPlan", "plan_columns"],
+    "sheets": ["get_sheet_session", "sheet_csv_url", "fetch_sheet", "download_sheet"],
+    "files": [
+        "table_format", "iter_table_chunks", "iter_record_batches",
+        "import_pyarrow"
+    ],
+    "variables": [
+        "migrate_variables_from_googlesheet", "migrate_variables_from_csv",
+        "migrate_variables", "plan_variables", "plan_found_object",
+        "plan_base_variable", "build_datatype_index", "resolve_datatypes",
+        "dto_to_dict", "changed_fields", "comparable_value", "normalize_name",
+        "VariablesLookupCache", "create_base_variable", "update_base_variable",
+        "get_variables", "iter_variables_details"
+    ],
+    "objects": [
+        "update_objects_from_googlesheet", "update_objects_from_csv",
+        "update_objects", "create_objects_from_googlesheet",
+        "create_objects_from_csv", "create_objects_from_file",
+        "update_objects_from_file", "object_columns",
+        "create_update_objects_from_file", "object_report_columns",
+        "create_update_objects", "send_scientific_object", "plan_objects"
+    ],
+    "data": [
+        "transformDate", "normalize_dates", "add_data_from_googlesheet",
+        "add_data_from_csv", "add_data_from_file", "data_columns",
+        "data_report_columns", "data_reject_columns",
+        "add_data_from", "add_data_from_chunks", "iter_data_batches",
+        "build_data_list", "send_data_batch", "is_rejected_data",
+        "send_data_bisecting", "data_export_columns", "export_data",
+        "iter_data_pages", "data_page_frame", "open_export_writer",
+        "export_value_type", "widen_export_file", "export_table"
+    ],
+    "users": ["create_users_from_google_sheet"],
+}
+
+_exports = {
+    name: submodule
+    for submodule, names in _submodules.items()
+    for name in names
+}
+
+__all__ = ["setup_logging"] + list(_exports)
+
+
+def __getattr__(name):
+    # Import the submodule defining the name on first use
+    if name in _exports:
+        submodule = importlib.import_module("." + _exports[name], __name__)
+        value = getattr(submodule, name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_exports))
+
+
+def setup_logging(level=logging.DEBUG, log_file="debug.log"):
+    """Log the messages of the imports to the console and to a file
+
+    Parameters
+    ----------
+    level: int = logging.DEBUG
+        The minimum level of the messages logged
+    log_file: str = "debug.log"
+        The file the messages are written to, None to only log to the
+        console
+    """
+    handlers = [logging.StreamHandler()]
+    if log_file is not None:
+        handlers.insert(0, logging.FileHandler(log_file))
+    logging.basicConfig(level=level, handlers=handlers, format='%(asctime)s %(levelname)-8s\
+     [%(filename)s:%(lineno)d] %(message)s')
@@ -0,0 +1,253 @@
+"""Clients shared by the imports : pool of clients and token renewal"""
+
+import opensilexClientToolsPython
+import copy
+import json
+import base64
+import queue
+import contextlib
+import time
+import logging
+import threading
+from typing import Union
+
+# %%
+class ClientPool:
+    """Pool of authenticated clients shared by several threads
+
+    The generated ApiClient keeps a single urllib3 pool sized for one
+    caller. A ClientPool holds several clients, each with its own
+    connection pool, and lends one of them to every request. It can be
+    given to any of the functions of this module, and to the api classes
+    of opensilexClientToolsPython, in place of a single ApiClient.
+
+    Parameters
+    ----------
+    client: opensilexClientToolsPython.ApiClient
+        An authenticated client, its host and headers are copied to the
+        other clients of the pool
+    size: int = 4
+        The number of clients in the pool, i.e. the number of requests
+        that can run at the same time
+    connection_pool_maxsize: int = None
+        The number of connections kept by each client, size by default
+    timeout: float | tuple = None
+        Default timeout in seconds of the requests, either a total or a
+        (connect, read) tuple. Without it requests can wait forever
+    keep_alive: bool = True
+        Whether to keep the connections open between requests
+    """
+
+    def __init__(
+        self, client, size=4, connection_pool_maxsize=None, timeout=None,
+        keep_alive=True
+    ):
+        if size < 1:
+            raise ValueError("size must be at least 1, got {}".format(size))
+        self.size = size
+        self.timeout = timeout
+        self.clients = [client]
+        self.idle = queue.LifoQueue()
+
+        maxsize = connection_pool_maxsize or size
+        for i in range(size):
+            if i > 0:
+                configuration = copy.copy(client.configuration)
+                configuration.connection_pool_maxsize = maxsize
+                self.clients.append(
+                    opensilexClientToolsPython.ApiClient(configuration=configuration)
+                )
+            self.clients[i].default_headers.update(client.default_headers)
+            self.clients[i].set_default_header(
+                "Connection", "keep-alive" if keep_alive else "close"
+            )
+            self.idle.put(self.clients[i])
+
+    @classmethod
+    def connect(cls, identifier, password, host, **kwargs):
+        """Authenticate to Opensilex and return a pool of clients
+
+        The keyword arguments are those of ClientPool
+        """
+        configuration = opensilexClientToolsPython.Configuration()
+        configuration.connection_pool_maxsize = (
+            kwargs.get("connection_pool_maxsize") or kwargs.get("size", 4)
+        )
+        client = opensilexClientToolsPython.ApiClient(configuration=configuration)
+        client.connect_to_opensilex_ws(
+            identifier=identifier, password=password, host=host
+        )
+        return cls(client, **kwargs)
+
+    @contextlib.contextmanager
+    def acquire(self):
+        """Borrow a client of the pool, waiting for one to be free"""
+        client = self.idle.get()
+        try:
+            yield client
+        finally:
+            self.idle.put(client)
+
+    def call_api(self, *args, **kwargs):
+        """Send a request with a client of the pool"""
+        if kwargs.get("_request_timeout") is None:
+            kwargs["_request_timeout"] = self.timeout
+        with self.acquire() as client:
+            return client.call_api(*args, **kwargs)
+
+    def set_default_header(self, header_name, header_value):
+        """Set a header on every client of the pool"""
+        for client in self.clients:
+            client.set_default_header(header_name, header_value)
+
+    def __getattr__(self, name):
+        # Everything else (header selection, serialization, configuration)
+        # doesn't send requests and is shared by all the clients
+        return getattr(self.clients[0], name)
+
+# Any of the clients accepted by the functions of this module
+PythonClient = Union[opensilexClientToolsPython.ApiClient, ClientPool]
+
+# %%
+class SessionManager:
+    """Keep the clients authenticated during long imports
+
+    A background thread authenticates again shortly before the token
+    expires and gives the new token to every client. The requests
+    running meanwhile are not paused, they keep the old token until it
+    is replaced. A request answered with 401 Unauthorized is sent once
+    more after authenticating again.
+
+    Can be used as a context manager to start and stop the refresh.
+
+    Parameters
+    ----------
+    python_client: opensilexClientToolsPython.ApiClient | ClientPool
+        The authenticated client (or pool of clients) to keep connected
+    identifier: str
+        The identifier used to connect to Opensilex
+    password: str
+        The password used to connect to Opensilex
+    refresh_margin: float = 300
+        How many seconds before the expiration the token is renewed
+    refresh_interval: float = 1800
+        How often in seconds the token is renewed when its expiration
+        can't be read from it
+    retry_interval: float = 30
+        How long in seconds to wait before trying again when a refresh
+        fails
+    """
+
+    def __init__(
+        self, python_client, identifier, password, refresh_margin=300,
+        refresh_interval=1800, retry_interval=30
+    ):
+        self.identifier = identifier
+        self.password = password
+        self.refresh_margin = refresh_margin
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+        if isinstance(python_client, ClientPool):
+            self.clients = python_client.clients
+        else:
+            self.clients = [python_client]
+        self.host = self.clients[0].configuration.host
+        self.token = self.clients[0].default_headers.get("Authorization")
+        self.expires_at = token_expiration(self.token)
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+        for client in self.clients:
+            client.call_api = self._retry_unauthorized(client.call_api)
+
+    def start(self):
+        """Start renewing the token in the background"""
+        if self.thread is None or not self.thread.is_alive():
+            self.stopped.clear()
+            self.thread = threading.Thread(
+                target=self._run, name="opensilex-token-refresh", daemon=True
+            )
+            self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop renewing the token"""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def refresh(self, expired_token=None):
+        """Authenticate again and give the new token to all the clients
+
+        If expired_token is given and another thread already replaced it,
+        the current token is kept.
+        """
+        with self.lock:
+            if expired_token is not None and expired_token != self.token:
+                return self.token
+            # Authenticate with a separate client so the requests running
+            # on the others are not disturbed
+            client = opensilexClientToolsPython.ApiClient(
+                configuration=copy.copy(self.clients[0].configuration)
+            )
+            client.connect_to_opensilex_ws(
+                identifier=self.identifier, password=self.password, host=self.host
+            )
+            self.token = client.default_headers["Authorization"]
+            self.expires_at = token_expiration(self.token)
+            for c in self.clients:
+                c.set_default_header("Authorization", self.token)
+            logging.info("Opensilex token renewed")
+            return self.token
+
+    def seconds_before_refresh(self) -> float:
+        """Return how long to wait before the next refresh"""
+        if self.expires_at is None:
+            return self.refresh_interval
+        return max(0, self.expires_at - self.refresh_margin - time.time())
+
+    def _run(self):
+        delay = self.seconds_before_refresh()
+        while not self.stopped.wait(delay):
+            try:
+                self.refresh()
+                delay = self.seconds_before_refresh()
+            except Exception as e:
+                logging.error(
+                    "Could not renew the token, trying again in {} s : {}"\
+                        .format(self.retry_interval, e)
+                )
+                delay = self.retry_interval
+
+    def _retry_unauthorized(self, call_api):
+        def call_api_with_retry(*args, **kwargs):
+            token = self.token
+            try:
+                return call_api(*args, **kwargs)
+            except Exception as e:
+                if getattr(e, "status", None) != 401:
+                    raise
+                logging.warning("Request unauthorized, authenticating again")
+                self.refresh(expired_token=token)
+                # The client adds its default headers to every request, so
+                # the retry is sent with the new token
+                return call_api(*args, **kwargs)
+        return call_api_with_retry
+
+def token_expiration(token: str) -> float:
+    """Return the expiration timestamp of a JWT, None if it can't be read"""
+    if not token:
+        return None
+    try:
+        payload = token.split()[-1].split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
@@ -0,0 +1,947 @@
+"""Import and export of data (observations) and parsing of their dates"""
+
+import opensilexClientToolsPython
+import re
+import time
+import pandas as pd
+import logging
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Union
+from pydantic import validate_arguments
+from .clients import PythonClient
+from .files import (
+    import_pyarrow, iter_record_batches, iter_table_chunks, table_format
+)
+from .journal import ImportJournal
+from .ledger import OutcomeLedger
+from .instrumentation import metrics
+from .sheets import download_sheet, sheet_csv_url
+from .utils import is_last_page, map_bounded, page_count
+
+# Each distinct raw date is only parsed once by dateparser
+@lru_cache(maxsize=65536)
+def transformDate(date):
+    # dateparser takes a long time to import and is only needed for the
+    # dates that aren't ISO 8601
+    from dateparser import parse
+    try:
+        date = parse(date)
+    except Exception as e:
+        logging.error("Exception : %s\n" % e)
+    return date.astimezone().isoformat()
+
+# ISO 8601 dates, which pandas parses much faster than dateparser
+iso_date_pattern = re.compile(
+    r"^(?P<date>\d{4}-\d{2}-\d{2})"
+    r"(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?"
+    r"(?P<tz>Z|[+-]\d{2}:?\d{2})?$"
+)
+
+# pandas >= 2 infers one format for a whole column unless told otherwise
+iso_date_options = {"format": "ISO8601"} if int(pd.__version__.split(".")[0]) >= 2 else {}
+
+def normalize_dates(dates: pd.Series) -> pd.Series:
+    """Normalize a column of dates the same way as transformDate
+
+    Every distinct value is parsed once. ISO 8601 values are parsed by
+    pandas in one vectorized call and only the other formats go through
+    dateparser.
+
+    Parameters
+    ----------
+    dates: pd.Series
+        The raw dates
+
+    Returns
+    -------
+    pd.Series
+        The dates as ISO 8601 strings in the local timezone, None for
+        the missing dates and those that couldn't be parsed
+    """
+    # Missing dates would become "nan", which dateparser turns into a date
+    missing = dates.isna()
+    if missing.any():
+        logging.error("{} rows have no date\n".format(missing.sum()))
+    raw_dates = dates.astype(str)
+    uniques = pd.Series(raw_dates[~missing].unique(), dtype=object)
+
+    # Detect the values that can use the fast path
+    iso_parts = uniques.str.extract(iso_date_pattern)
+    is_iso = iso_parts["date"].notna()
+    has_timezone = iso_parts["tz"].notna()
+
+    normalized = {}
+    timestamps = pd.to_datetime(
+        uniques[is_iso], utc=True, errors="coerce", **iso_date_options
+    )
+    for raw_date, timestamp, aware in zip(
+        uniques[is_iso], timestamps, has_timezone[is_iso]
+    ):
+        if pd.isna(timestamp):
+            continue
+        # Dates without timezone are local times, like for dateparser
+        if not aware:
+            timestamp = timestamp.tz_localize(None)
+        normalized[raw_date] = timestamp.to_pydatetime().astimezone().isoformat()
+
+    # Fall back to dateparser for everything else
+    unparsed = []
+    for raw_date in uniques:
+        if raw_date not in normalized:
+            try:
+                normalized[raw_date] = transformDate(raw_date)
+            except Exception:
+                normalized[raw_date] = None
+                unparsed.append(raw_date)
+    if unparsed:
+        logging.error("Couldn't parse the following dates : {}\n".format(unparsed))
+
+    return raw_dates.map(normalized).astype(object).where(~missing, None)
+
+
+
+@validate_arguments(config=dict(arbitrary_types_allowed=True))
+def add_data_from_googlesheet(
+    python_client: PythonClient,
+    spreadsheet_url: str,
+    gid_number: Union[str, int],
+    batch_size: int = 1000,
+    max_workers: int = 1,
+    journal: ImportJournal = None,
+    bisect_failures: bool = False,
+    reject_path: str = "rejected_data.csv"
+):
+    variables_url = sheet_csv_url(spreadsheet_url, gid_number)
+    logging.debug("variables url : " + variables_url)
+    data_chunks = pd.read_csv(download_sheet(variables_url), chunksize=batch_size)
+    return add_data_from_chunks(
+        python_client, data_chunks, batch_size=batch_size, max_workers=max_workers,
+        journal=journal, source=variables_url,
+        bisect_failures=bisect_failures, reject_path=reject_path
+    )
+
+@validate_arguments(config=dict(arbitrary_types_allowed=True))
+def add_data_from_csv(
+    python_client: PythonClient,
+    csv_path: str,
+    batch_size: int = 1000,
+    max_workers: int = 1,
+    journal: ImportJournal = None,
+    bisect_failures: bool = False,
+    reject_path: str = "rejected_data.csv"
+):
+    # Read the file one chunk at a time so memory doesn't grow with its size
+    data_chunks = pd.read_csv(csv_path, chunksize=batch_size)
+    return add_data_from_chunks(
+        python_client, data_chunks, batch_size=batch_size, max_workers=max_workers,
+        journal=journal, source=os.path.abspath(csv_path),
+        bisect_failures=bisect_failures, reject_path=reject_path
+    )
+
+@validate_arguments(config=dict(arbitrary_types_allowed=True))
+def add_data_from_file(
+    python_client: PythonClient,
+    path: str,
+    batch_size: int = 1000,
+    max_workers: int = 1,
+    journal: ImportJournal = None,
+    bisect_failures: bool = False,
+    reject_path: str = "rejected_data.csv",
+    memory_map: bool = True
+):
+    """Send the data of a csv, Parquet or Arrow IPC file to opensilex
+
+    The file is read one chunk at a time (see iter_table_chunks), Parquet
+    and Arrow files with pyarrow, and only its data columns, so huge 
+    files don't need to fit in memory.
+
+    Parameters
+    ----------
+    python_client: opensilexClientToolsPython.ApiClient | ClientPool
+        The authenticated client to connect to Opensilex
+    path: str
+        The file to import, its format is given by its extension (see 
+        table_format)
+    memory_map: bool = True
+        Wether to memory map the uncompressed Parquet and Arrow files
+
+    The other parameters and the result are those of add_data_from.
+    """
+    data_chunks = iter_table_chunks(
+        path, batch_size=batch_size, columns=data_columns, memory_map=memory_map
+    )
+    return add_data_from_chunks(
+        python_client, data_chunks, batch_size=batch_size, max_workers=max_workers,
+        journal=journal, source=os.path.abspath(path),
+        bisect_failures=bisect_failures, reject_path=reject_path
+    )
+
+# Columns of the data sent to opensilex, variableURI being read as
+# variable_uri (the name used by the exports and csv_example/data.csv)
+data_columns = [
+    "date", "objectURI", "variable_uri", "variableURI", "value",
+    "provenanceURI", "experimentURI"
+]
+
+# Columns of the batch report returned by add_data_from
+data_report_columns = [
+    "batch", "first_row", "last_row", "rows", "status", "rejected", "unsent",
+    "seconds", "error"
+]
+
+# Columns of the file of rejected rows
+data_reject_columns = [
+    "row", "date", "objectURI", "variable_uri", "value", "provenanceURI",
+    "experimentURI", "error"
+]
+
+@validate_arguments(config=dict(arbitrary_types_allowed=True))
+def add_data_from(
+    python_client: PythonClient,
+    data_csv: pd.DataFrame,
+    batch_size: int = 1000,
+    max_workers: int = 1,
+    journal: ImportJournal = None,
+    source: str = None,
+    bisect_failures: bool = False,
+    reject_path: str = "rejected_data.csv"
+):
+    """Send data to opensilex in batches of bounded size
+
+    Parameters
+    ----------
+    python_client: opensilexClientToolsPython.ApiClient | ClientPool
+        The authenticated client to connect to Opensilex
+    data_csv: pd.DataFrame
+        A pandas DataFrame with the columns "date", "objectURI",
+        "variable_uri" (or "variableURI"), "value", "provenanceURI" and
+        "experimentURI"
+    batch_size: int = 1000
+        The maximum number of observations sent in one request
+    max_workers: int = 1
+        The maximum number of requests sent at the same time
+    journal: ImportJournal = None
+        If given, the outcome of each batch is saved in this journal and the
+        rows it already records as sent are skipped. To resume an import, 
+        use the same source and the same or a smaller batch_size
+    source: str = None
+        The name of the imported file or sheet in the journal (required
+        with a journal)
+    bisect_failures: bool = False
+        Wether to split a rejected batch in halves, again and again, until
+        the rows that are actually rejected are isolated. The other rows
+        are still sent and the rejected ones are saved in reject_path
+    reject_path: str = "rejected_data.csv"
+        The csv file where the rejected rows are saved with the error 
+        returned by opensilex. When an import is resumed from the journal
+        the rows are appended to it, so the rows rejected before are kept
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per batch with the rows it covered, its status ("sent",
+        "partial" if some rows were rejected or left unsent by an error
+        after others were sent, "rejected", "duplicate", "failed" or 
+        "skipped" if the journal records it as sent), the number of 
+        rejected and unsent rows, the time it took and the error if any
+    """
+    return add_data_from_chunks(
+        python_client, [data_csv], batch_size=batch_size, max_workers=max_workers,
+        journal=journal, source=source,
+        bisect_failures=bisect_failures, reject_path=reject_path
+    )
+
+def add_data_from_chunks(
+    python_client,
+    data_chunks,
+    batch_size=1000,
+    max_workers=1,
+    journal=None,
+    source=None,
+    bisect_failures=False,
+    reject_path="rejected_data.csv"
+):
+    """Send data to opensilex from a stream of DataFrames
+
+    Each chunk is converted and sent before the rest of the stream is
+    read, so only a few chunks are held in memory at a time.
+
+    Parameters
+    ----------
+    python_client: opensilexClientToolsPython.ApiClient | ClientPool
+        The authenticated client to connect to Opensilex
+    data_chunks: Iterable[pd.DataFrame]
+        The DataFrames to send, in order (for example the reader returned
+        by pd.read_csv with a chunksize). Same columns as in add_data_from
+    batch_size: int = 1000
+        The maximum number of observations sent in one request
+    max_workers: int = 1
+        The maximum number of requests sent at the same time. With more
+        than one worker the batches are sent by a pool of threads
+    journal: ImportJournal = None
+        The journal to skip the batches already sent and to save the 
+        outcomes in (see add_data_from)
+    source: str = None
+        The name of the imported file or sheet in the journal
+    bisect_failures: bool = False
+        Wether to isolate the rejected rows of the failing batches
+        (see add_data_from)
+    reject_path: str = "rejected_data.csv"
+        The csv file where the rejected rows are saved
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per batch (see add_data_from) in the order of the data,
+        the rows being numbered across all the chunks
+    """
+
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1, got {}".format(batch_size))
+    if journal is not None and source is None:
+        raise ValueError("A source is needed to use a journal")
+
+    data_api = opensilexClientToolsPython.DataApi(python_client)
+
+    # Rejected rows are written to the reject file as they are found. The
+    # rows rejected by the previous runs of a resumed import are skipped,
+    # so they are kept in the file
+    rejects = None
+    if bisect_failures:
+        rejects = OutcomeLedger(
+            paths={"rejected": reject_path},
+            columns={"rejected": data_reject_columns},
+            stream=True,
+            keep_in_memory=False,
+            flush_every=100,
+            append=journal is not None and journal.has_outcomes(source)
+        )
+
+    logging.info(
+        "sending observations in batches of {} with {} workers".format(
+            batch_size, max_workers
+        )
+    )
+
+    # Send the batches, possibly several at once
+    begin = time.perf_counter()
+    batch_reports = list(map_bounded(
+        lambda batch_info: send_data_batch(
+            data_api, *batch_info, journal=journal, source=source, rejects=rejects
+        ),
+        iter_data_batches(data_chunks, batch_size),
+        max_workers=max_workers
+    ))
+    if rejects is not None:
+        rejects.close()
+
+    # Put the reports back in the order of the data
+    report = pd.DataFrame(batch_reports, columns=data_report_columns)\
+        .sort_values("batch", ignore_index=True)
+    partial = report.status == "partial"
+    sent = (
+        report.loc[report.status.isin(["sent", "partial"]), "rows"].sum()
+        - report.loc[partial, "rejected"].sum()
+        - report.loc[partial, "unsent"].sum()
+    )
+    logging.info(
+        "{} observations sent ({:.0f} rows/s), {} rejected, {} unsent, {} batches skipped, {} batches failed".format(
+            sent,
+            sent / max(time.perf_counter() - begin, 1e-9),
+            report.rejected.sum(),
+            report.unsent.sum(),
+            (report.status == "skipped").sum(),
+            report.status.isin(["duplicate", "failed"]).sum()
+        )
+    )
+    return report
+
+def iter_data_batches(data_chunks, batch_size):
+    """Split a stream of DataFrames into batches
+
+    Parameters
+    ----------
+    data_chunks: Iterable[pd.DataFrame]
+        The DataFrames to split
+    batch_size: int
+        The maximum number of rows in a batch
+
+    Yields
+    ------
+    Tuple[int, int, pd.DataFrame]
+        The number of the batch, the position of its first row in the
+        whole stream and the rows of the batch
+    """
+    batch_number = 0
+    start = 0
+    chunks = iter(data_chunks)
+    while True:
+        # Time the reading (and parsing) of each chunk
+        begin = time.perf_counter()
+        chunk = next(chunks, None)
+        if chunk is None:
+            break
+        if "variable_uri" not in chunk.columns and "variableURI" in chunk.columns:
+            chunk = chunk.rename(columns={"variableURI": "variable_uri"})
+        metrics.record_stage("data.read", time.perf_counter() - begin, len(chunk))
+        for chunk_start in range(0, len(chunk), batch_size):
+            batch = chunk.iloc[chunk_start:chunk_start + batch_size]
+            yield batch_number, start, batch
+            batch_number += 1
+            start += len(batch)
+
+def build_data_list(batch):
+    """Build the DataCreationDTO objects for a batch of rows
+
+    Parameters
+    ----------
+    batch: pd.DataFrame
+        The rows to convert
+
+    Returns
+    -------
+    List[opensilexClientToolsPython.DataCreationDTO]
+    """
+    data_list = []
+    dates = normalize_dates(batch["date"])
+    for date, object_uri, variable_uri, value, provenance_uri, experiment_uri in zip(
+        dates, batch["objectURI"], batch["variable_uri"],
+        batch["value"], batch["provenanceURI"], batch["experimentURI"]
+    ):
+        provenanceData = opensilexClientToolsPython.DataProvenanceModel(
+            uri=provenance_uri, experiments=[experiment_uri])
+
+        data_list.append(opensilexClientToolsPython.DataCreationDTO(
+            _date=date,
+            scientific_objects=[object_uri],
+            variable=variable_uri,
+            value=value,
+            provenance=provenanceData
+        ))
+    return data_list
+
+def send_data_batch(
+    data_api, batch_number, start, batch, journal=None, source=None, rejects=None
+):
+    """Send one batch of data and report how it went
+
+    Parameters
+    ----------
+    data_api: opensilexClientToolsPython.DataApi
+        The api used to send the data
+    batch_number: int
+        The position of the batch in the upload
+    start: int
+        The position of the first row of the batch in the whole upload
+    batch: pd.DataFrame
+        The rows to send
+    journal: ImportJournal = None
+        The journal to skip the batch if sent and to save its outcome in
+    source: str = None
+        The name of the imported file or sheet in the journal
+    rejects: OutcomeLedger = None
+        If given, a rejected batch is bisected and its rejected rows are 
+        recorded in this ledger (outcome "rejected"). If an error stops the
+        bisection after some halves were sent, the batch is "partial" and
+        the journal records the sent rows on their own, so only the unsent
+        ones are sent again when the import is resumed
+
+    Returns
+    -------
+    dict
+        The report of the batch (see data_report_columns)
+    """
+    batch_report = {
+        "batch": batch_number,
+        "first_row": start,
+        "last_row": start + len(batch) - 1,
+        "rows": len(batch),
+        "status": "sent",
+        "rejected": 0,
+        "unsent": 0,
+        "seconds": None,
+        "error": None
+    }
+    # Number of each row of the batch in the whole upload
+    row_numbers = list(range(start, start + len(batch)))
+    if journal is not None:
+        if journal.is_done(
+            source, batch_report["first_row"], batch_report["last_row"]
+        ):
+            batch_report["status"] = "skipped"
+            return batch_report
+
+        # Rows sent before the batch was interrupted by an error
+        done = journal.done_rows(
+            source, batch_report["first_row"], batch_report["last_row"]
+        )
+        if done:
+            keep = [row not in done for row in row_numbers]
+            batch = batch[keep]
+            row_numbers = [row for row in row_numbers if row not in done]
+            batch_report["rows"] = len(batch)
+            if batch.empty:
+                batch_report["status"] = "skipped"
+                return batch_report
+
+    # Positions of the rows sent and rejected by a bisection
+    sent, rejected = [], []
+    interrupted = False
+    begin = time.perf_counter()
+    try:
+        if rejects is None:
+            with metrics.stage("data.transform", len(batch)):
+                data_list = build_data_list(batch)
+            with metrics.stage("data.upload", len(batch)):
+                data_api.add_list_data(body=data_list)
+        else:
+            try:
+                with metrics.stage("data.upload", len(batch)):
+                    send_data_bisecting(data_api, batch, sent=sent, rejected=rejected)
+            finally:
+                for position, error in rejected:
+                    rejects.record("rejected", {
+                        **batch.iloc[position].to_dict(),
+                        "row": row_numbers[position],
+                        "error": error
+                    })
+            if rejected:
+                batch_report["rejected"] = len(rejected)
+                batch_report["status"] = (
+                    "rejected" if len(rejected) == len(batch) else "partial"
+                )
+                batch_report["error"] = rejected[0][1]
+    except Exception as e:
+        interrupted = bool(sent or rejected)
+        if interrupted:
+            batch_report["status"] = "partial"
+            batch_report["rejected"] = len(rejected)
+            batch_report["unsent"] = len(batch) - len(rejected) - sum(
+                last - first + 1 for first, last in sent
+            )
+        else:
+            batch_report["status"] = "duplicate" if "DUPLICATE" in str(e) else "failed"
+        batch_report["error"] = str(e)
+        logging.error(
+            "Exception on batch {} (rows {} to {}) : {}\n".format(
+                batch_number, batch_report["first_row"],
+                batch_report["last_row"], e
+            )
+        )
+    batch_report["seconds"] = time.perf_counter() - begin
+    if journal is not None and interrupted:
+        # Only the rows sent or rejected are done, the others are retried
+        sent_rows = {
+            row_numbers[position]
+            for first, last in sent for position in range(first, last + 1)
+        }
+        rejected_rows = {row_numbers[position] for position, _ in rejected}
+        journal.record_rows(source, sent_rows, "sent")
+        journal.record_rows(source, rejected_rows, "rejected")
+        journal.record_rows(
+            source, set(row_numbers) - sent_rows - rejected_rows, "failed",
+            batch_report["error"]
+        )
+    elif journal is not None:
+        journal.record(
+            source, batch_report["first_row"], batch_report["last_row"],
+            batch_report["status"], batch_report["error"]
+        )
+    logging.debug(
+        "batch {} : {} rows {} in {:.2f}s".format(
+            batch_number, len(batch), batch_report["status"],
+            batch_report["seconds"]
+        )
+    )
+    return batch_report
+
+def is_rejected_data(error: Exception) -> bool:
+    """Tell if an error was caused by the content of the data sent
+
+    Parameters
+    ----------
+    error: Exception
+        The error raised while building or sending the data
+
+    Returns
+    -------
+    bool
+        True for client errors (bad or duplicate data), False for errors
+        that would happen again whatever the rows (authentication, network, 
+        server)
+    """
+    status = getattr(error, "status", None)
+    if status is not None:
+        return 400 <= status < 500 and status not in (401, 403, 404, 408, 429)
+    return isinstance(error, ValueError)
+
+def send_data_bisecting(data_api, rows, offset=0, sent=None, rejected=None):
+    """Send rows, splitting them in halves until the rejected ones are isolated
+
+    Errors that aren't caused by the rows (see is_rejected_data) are raised
+    as they happen, the halves sent before them being listed in sent.
+
+    Parameters
+    ----------
+    data_api: opensilexClientToolsPython.DataApi
+        The api used to send the data
+    rows: pd.DataFrame
+        The rows to send
+    offset: int = 0
+        The position of the first of these rows in the original batch
+    sent: list = None
+        If given, the positions (first, last) in the original batch of each
+        range of rows accepted by opensilex are appended to it
+    rejected: list = None
+        The list the rejected rows are appended to (a new one by default)
+
+    Returns
+    -------
+    List[Tuple[int, str]]
+        The position of each rejected row in the original batch with the
+        error returned for it
+    """
+    if rejected is None:
+        rejected = []
+    try:
+        data_api.add_list_data(body=build_data_list(rows))
+        if sent is not None:
+            sent.append((offset, offset + len(rows) - 1))
+        return rejected
+    except Exception as e:
+        if not is_rejected_data(e):
+            raise
+        if len(rows) == 1:
+            rejected.append((offset, str(e)))
+            return rejected
+        logging.debug("splitting {} rejected rows at {}".format(len(rows), offset))
+
+    half = len(rows) // 2
+    send_data_bisecting(data_api, rows.iloc[:half], offset, sent, rejected)
+    send_data_bisecting(data_api, rows.iloc[half:], offset + half, sent, rejected)
+    return rejected
+
+# %%
+# Columns of the exported data, those of csv_example/data.csv
+data_export_columns = [
+    "variableURI", "variable", "date", "value", "objectURI", "provenanceURI",
+    "experimentURI"
+]
+
+@validate_arguments(config=dict(arbitrary_types_allowed=True))
+def export_data(
+    python_client: PythonClient,
+    path: str,
+    experiments: Union[str, List[str]] = None,
+    variables: Union[str, List[str]] = None,
+    objects: Union[str, List[str]] = None,
+    start_date: str = None,
+    end_date: str = None,
+    page_size: int = 5000,
+    max_workers: int = 4,
+    variable_names: bool = True,
+    value_type: str = None,
+    **search_kwargs
+) -> int:
+    """Export data from opensilex to a csv, Parquet or Arrow IPC file
+
+    The data is fetched page by page, several pages at a time, and each 
+    page is written as soon as it arrives, so memory doesn't grow with the 
+    size of the export. The file has the columns of csv_example/data.csv 
+    (see data_export_columns) and can be imported again with 
+    add_data_from_file.
+
+    Parameters
+    ----------
+    python_client: opensilexClientToolsPython.ApiClient | ClientPool
+        The authenticated client to connect to Opensilex. Use a ClientPool
+        to really fetch several pages at a time
+    path: str
+        The file to write, its format is given by its extension (see 
+        table_format). Parquet and Arrow files need pyarrow
+    experiments: str | List[str] = None
+        Only export the data of these experiments
+    variables: str | List[str] = None
+        Only export the data of these variables
+    objects: str | List[str] = None
+        Only export the data of these scientific objects
+    start_date: str = None
+        Only export the data from this date (ISO 8601)
+    end_date: str = None
+        Only export the data until this date (ISO 8601)
+    page_size: int = 5000
+        The number of observations fetched by each request
+    max_workers: int = 4
+        The maximum number of pages fetched at the same time
+    variable_names: bool = True
+        Wether to fill the "variable" column with the names of the 
+        variables, which are fetched once each
+    value_type: str = None
+        The type of the "value" column in Parquet and Arrow files : 
+        "double" or "string". By default it is "double" as long as the 
+        values are all numbers : if a later page has other values, the 
+        pages already written are rewritten with string values and the 
+        export goes on (see widen_export_file). With "double" such a page 
+        raises a ValueError
+    search_kwargs
+        Other arguments passed to DataApi.search_data_list
+
+    Returns
+    -------
+    int
+        The number of observations exported
+    """
+    if value_type not in (None, "double", "string"):
+        raise ValueError(
+            'value_type must be "double" or "string", got {}'.format(value_type)
+        )
+
+    filters = {
+        "experiments": experiments,
+        "variables": variables,
+        "scientific_objects": objects,
+    }
+    for key, value in filters.items():
+        if value is not None:
+            search_kwargs[key] = [value] if isinstance(value, str) else value
+    if start_date is not None:
+        search_kwargs["start_date"] = start_date
+    if end_date is not None:
+        search_kwargs["end_date"] = end_date
+
+    # The variables module is only needed by the exports
+    from .variables import VariablesLookupCache
+    cache = VariablesLookupCache(python_client) if variable_names else None
+    file_format = table_format(path)
+    writer = None
+    written_type = None
+    rows = 0
+
+    # The writer is closed even if a page fails, so the file written until
+    # then stays readable
+    try:
+        for page in iter_data_pages(
+            python_client, page_size=page_size, max_workers=max_workers,
+            **search_kwargs
+        ):
+            with metrics.stage("data.export", len(page)):
+                frame = data_page_frame(page, cache)
+                if file_format == "csv":
+                    frame.to_csv(
+                        path, mode="a" if rows else "w", header=not rows, index=False
+                    )
+                else:
+                    if writer is None:
+                        written_type = value_type or export_value_type(frame["value"])
+                        writer, schema = open_export_writer(
+                            path, file_format, frame, written_type
+                        )
+                    elif (
+                        value_type is None and written_type == "double"
+                        and export_value_type(frame["value"]) == "string"
+                    ):
+                        # The first pages were all numbers, the file is
+                        # rewritten so the values of this page fit
+                        writer.close()
+                        writer = None
+                        writer, schema = widen_export_file(path, file_format)
+                        written_type = "string"
+                    writer.write_table(export_table(frame, schema))
+            rows += len(frame)
+            logging.debug("{} observations exported".format(rows))
+
+        # Write the header of an empty export
+        if file_format == "csv" and not rows:
+            pd.DataFrame(columns=data_export_columns).to_csv(path, index=False)
+        elif writer is None and file_format != "csv":
+            writer, schema = open_export_writer(
+                path, file_format, pd.DataFrame(columns=data_export_columns),
+                value_type or "double"
+            )
+    finally:
+        if writer is not None:
+            writer.close()
+
+    logging.info("{} observations exported to {}".format(rows, path))
+    return rows
+
+def iter_data_pages(
+    python_client: PythonClient,
+    page_size: int = 5000,
+    max_workers: int = 4,
+    **search_kwargs
+):
+    """Iterate over the data of opensilex page by page
+
+    The next max_workers pages are fetched in the background while the 
+    current one is being processed, so at most max_workers pages are held
+    besides it. The number of pages is read from the pagination metadata
+    of the first one, so no request is sent past the last page.
+
+    Parameters
+    ----------
+    python_client: opensilexClientToolsPython.ApiClient | ClientPool
+        The authenticated client to connect to Opensilex
+    page_size: int = 5000
+        The number of observations fetched by each request
+    max_workers: int = 4
+        The maximum number of pages fetched at the same time
+    search_kwargs
+        Other arguments passed to DataApi.search_data_list
+
+    Yields
+    ------
+    list
+        The observations of a page, as returned by search_data_list, in 
+        the order of the pages
+    """
+    data_api = opensilexClientToolsPython.DataApi(python_client)
+
+    def fetch_page(page):
+        return data_api.search_data_list(
+            page=page, page_size=page_size, **search_kwargs
+        )
+
+    max_workers = max(1, max_workers)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque([executor.submit(fetch_page, 0)])
+        page, next_page = 0, 1
+        while pending:
+            res = pending.popleft().result()
+            results = res["result"]
+
+            if is_last_page(res, page, page_size):
+                for future in pending:
+                    future.cancel()
+                if results:
+                    yield results
+                break
+
+            # Without pagination metadata the pages are fetched until a
+            # short one, those fetched after it are empty
+            pages = page_count(res, page_size)
+            while len(pending) < max_workers and (pages is None or next_page < pages):
+                pending.append(executor.submit(fetch_page, next_page))
+                next_page += 1
+            page += 1
+            yield results
+
+def data_page_frame(page: list, cache=None) -> pd.DataFrame:
+    """Convert a page of data returned by opensilex to the export columns
+
+    Parameters
+    ----------
+    page: list
+        The observations returned by DataApi.search_data_list
+    cache: VariablesLookupCache = None
+        If given, the names of the variables are looked up in it
+
+    Returns
+    -------
+    pd.DataFrame
+        The observations with the columns of data_export_columns
+    """
+    records = []
+    for data in page:
+        provenance = getattr(data, "provenance", None)
+        experiments = getattr(provenance, "experiments", None) or [None]
+        # Older versions of opensilex return the objects, newer the target
+        objects = getattr(data, "scientific_objects", None) \
+            or [getattr(data, "target", None)]
+        records.append({
+            "variableURI": data.variable,
+            "variable": None,
+            # Named _date by the generated client
+            "date": data._date,
+            "value": data.value,
+            "objectURI": objects[0],
+            "provenanceURI": getattr(provenance, "uri", None),
+            "experimentURI": experiments[0],
+        })
+    frame = pd.DataFrame(records, columns=data_export_columns)
+
+    if cache is not None:
+        names = {}
+        for uri in frame["variableURI"].dropna().unique():
+            try:
+                names[uri] = cache.get_details("variable", uri).get("name")
+            except Exception as e:
+                logging.error("Couldn't get the variable {} : {}\n".format(uri, e))
+                names[uri] = None
+        frame["variable"] = frame["variableURI"].map(names)
+    return frame
+
+def open_export_writer(path, file_format, frame, value_type):
+    """Open a pyarrow writer for the export, typing "value" from frame"""
+    pa = import_pyarrow()
+    if value_type is None:
+        value_type = export_value_type(frame["value"])
+    schema = pa.schema([
+        (column, pa.float64() if column == "value" and value_type == "double"
+            else pa.string())
+        for column in data_export_columns
+    ])
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(path, schema), schema
+    from pyarrow import ipc
+    return ipc.new_file(path, schema), schema
+
+def export_value_type(values: pd.Series) -> str:
+    """Return the type of the exported values : "double" if they are all
+    numbers, else "string"
+    """
+    return "double" if all(
+        isinstance(v, (int, float)) and not isinstance(v, bool)
+        for v in values.dropna()
+    ) else "string"
+
+def widen_export_file(path, file_format):
+    """Rewrite a closed Parquet or Arrow export with string values
+
+    The file is moved aside and copied back one record batch at a time,
+    the numbers becoming their text (1.5 as "1.5"). If the copy fails the
+    file is put back as it was.
+
+    Returns
+    -------
+    tuple
+        The writer of the rewritten file, still open to write the next
+        pages, and its schema
+    """
+    double_path = path + ".double"
+    os.replace(path, double_path)
+    writer, schema = open_export_writer(path, file_format, None, "string")
+    try:
+        for record_batch in iter_record_batches(
+            double_path, file_format, 65536, None, False
+        ):
+            writer.write_table(export_table(record_batch.to_pandas(), schema))
+    except BaseException:
+        writer.close()
+        os.replace(double_path, path)
+        raise
+    os.remove(double_path)
+    return writer, schema
+
+def export_table(frame, schema):
+    """Convert a page of the export to a pyarrow Table of the schema"""
+    pa = import_pyarrow()
+    frame = frame.astype(object).where(frame.notna(), None)
+    if schema.field("value").type == pa.float64():
+        try:
+            frame["value"] = pd.to_numeric(frame["value"]).astype(float)
+        except (TypeError, ValueError) as e:
+            raise ValueError(
+                'Some exported values aren\'t numbers, use value_type="string" : {}'
+                .format(e)
+            ) from e
+    else:
+        frame["value"] = frame["value"].map(str, na_action="ignore")
+    for column in data_export_columns:
+        if column != "value":
+            frame[column] = frame[column].map(str, na_action="ignore")
+    return pa.Table.from_pandas(frame, schema=schema, preserve_index=False)
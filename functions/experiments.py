@@ -0,0 +1,160 @@
+"""Creation of experiments, sensors and provenances"""
+
+import opensilexClientToolsPython
+import logging
+from datetime import datetime
+from typing import List
+from pydantic import validate_arguments
+from .clients import PythonClient
+
+# %%
+
+@validate_arguments(config=dict(arbitrary_types_allowed=True))
+def create_experiment(
+    python_client: PythonClient, 
+    name: str, 
+    objective: str, 
+    start_date: datetime, 
+    end_date: datetime = None, 
+    uri: str = None, 
+    description: str = None, 
+    species: List[str] = None, 
+    variables: List[str] = None, 
+    organisations: List[str] = None, 
+    projects: List[str] = None, 
+    scientific_supervisorslist: str = None, 
+    technical_supervisors: List[str] = None, 
+    groups: List[str] = None, 
+    factors: List[str] = None, 
+    is_public: bool = None
+) -> dict:
+    """Creates an experiment
+
+    Parameters
+    ----------
+    python_client : opensilexClientToolsPython.ApiClient | ClientPool
+        The authenticated client to connect to Opensilex
+
+    All the following arguments can be unpacked from a dict for easier use.
+    To do so you just have to call the function as follows :
+        create_experiment(python_client, **my_dict)
+
+    name: str 
+        The name of the experiment (required)
+    objective: str 
+        The objective of the experiment (required)
+    start_date: datetime 
+        The starting date of the experiment (required)
+    end_date: datetime = None 
+        The end date of the experiment
+    uri: str = None 
+        The uri of the experiment (optional, will be auto-generated if 
+        none is given)
+    description: str = None 
+        A short description of the experiment
+    species: List[str] = None 
+        A list of the species in the experiment
+    variables: List[str] = None 
+        A list of the variables of the experiment
+    organisations: List[str] = None 
+        A list of the organisations that take part in the experiment (NOT SURE)
+    projects: List[str] = None 
+        A list of the projects in the experiment (NOT SURE)
+    scientific_supervisorslist: str = None 
+        The name (or uri) of the supervisor of the experiment (NOT SURE)
+    technical_supervisors: List[str] = None 
+        The names (or uris) of the supervisors of the experiment (NOT SURE)
+    groups: List[str] = None 
+        The groups (uris) that have acces to this experiment
+    factors: List[str] = None 
+        The factors (uris) studied in the experiment (NOT SURE)
+    is_public: bool = None 
+        Wether or not the experiment is public
+
+    Returns
+    -------
+    dict
+        A dictionary representing the experiment (with the 
+        auto-generated uri if none was specified)
+    """
+
+    # Extract all non-None arguments for experiment as a dictionary
+    loc = locals()
+    experiment = {
+        k: loc[k] 
+        for k in loc.keys() 
+        if(k!="python_client" and loc[k]!=None)
+    }
+
+    # Create an instance of the Experiment Api
+    experiment_os_api = opensilexClientToolsPython\
+        .ExperimentsApi(python_client)
+
+    # Creating an object of ExperimentCreationDTO class to use for 
+    # experiment creation
+    new_expriment = opensilexClientToolsPython\
+        .ExperimentCreationDTO(**experiment)
+
+    try:
+        # Creating an experiment on Opensilex and catching the result
+        experiment_result = experiment_os_api\
+            .create_experiment(body=new_expriment)
+        # Updating the uri in case none was specified
+        experiment["uri"] = experiment_result.get("result")[0]
+        logging.info("new experiment " + experiment["name"] + " created")
+
+        # Return the updated dict
+        return experiment
+
+    # Catch exceptions to use custom error message if the experiment 
+    # already exists
+    except Exception as e:
+        if "exists" not in str(e):
+            logging.error("Exception : %s\n" % e)
+        else:
+            logging.info("experiment " + experiment["name"] + " already exists")
+
+# %%
+def create_sensor(python_client,sensor):
+    device_api = opensilexClientToolsPython.DevicesApi(python_client)
+    sensorTosend = opensilexClientToolsPython.DeviceCreationDTO(
+        uri=sensor["uri"], name=sensor["name"], rdf_type=sensor["type"],
+        serial_number=sensor["serial_number"], description=sensor["description"])
+    try:
+        result = device_api.create_device(body=sensorTosend)
+        return result.get("result")[0]
+    except Exception as e:
+        if "exists" not in str(e):
+            logging.error("Exception : %s\n" % e)
+            exit()
+        else:
+            logging.info("sensor " + sensor["name"] + " exists")
+
+
+
+def create_provenances(python_client,provenances):
+    data_api = opensilexClientToolsPython.DataApi(python_client)
+    provenanceUris = []
+
+    for provenance in provenances:
+        prov_agent = []
+        if "prov_agent" in provenance and provenance["prov_agent"] != None and len(provenance["prov_agent"]) > 0:
+            for agent in provenance["prov_agent"]:
+                prov_agent_to_send = opensilexClientToolsPython.AgentModel(
+                    uri=agent["uri"], rdf_type=agent["rdf_type"])
+                prov_agent.append(prov_agent_to_send)
+
+        provenanceTOSend = opensilexClientToolsPython.ProvenanceCreationDTO(
+            uri=provenance["uri"], name=provenance["name"], description=provenance["description"], prov_agent=prov_agent
+        )
+        try:
+            result = data_api.create_provenance(body=provenanceTOSend)
+            provenance["uri"] = result.get("result")[0]
+            provenanceUris.append(provenance)
+        except Exception as e:
+            if "exists" not in str(e) and "duplicate"  not in str(e) :
+                logging.error("Exception : %s\n" % e)
+                exit()
+            else:
+                logging.info("provenance " + provenance["name"] + " exists")
+    return provenanceUris
@@ -0,0 +1,153 @@
+"""Reading of the imported files : csv, Parquet and Arrow IPC"""
+
+import pandas as pd
+
+# Extensions of the formats read with pyarrow
+parquet_extensions = (".parquet", ".pq")
+arrow_extensions = (".arrow", ".arrows", ".feather", ".ipc")
+
+# Extensions of the Arrow streams compressed as a whole, decompressed while
+# they are read
+compression_extensions = (".gz", ".bz2", ".zst", ".lz4")
+
+# %%
+def table_format(path: str) -> str:
+    """Return the format of a file from its extension
+
+    Returns
+    -------
+    str
+        "parquet", "arrow" (Arrow IPC file or stream, Feather v2) or "csv"
+        for everything else
+
+    Raises
+    ------
+    ValueError
+        If a Parquet file is compressed as a whole (.parquet.gz...)
+    """
+    name = path.lower()
+    compressed = name.endswith(compression_extensions)
+    if compressed:
+        name = name.rsplit(".", 1)[0]
+    if name.endswith(parquet_extensions):
+        if compressed:
+            raise ValueError(
+                "{} : Parquet files can't be compressed as a whole, decompress "
+                "it or write it with Parquet compression instead".format(path)
+            )
+        return "parquet"
+    if name.endswith(arrow_extensions):
+        return "arrow"
+    return "csv"
+
+def iter_table_chunks(
+    path: str, batch_size: int = 1000, columns: list = None,
+    memory_map: bool = True
+):
+    """Read a csv, Parquet or Arrow IPC file one chunk at a time
+
+    Parquet and Arrow files are read with pyarrow, without going through
+    csv, so the columns keep their types (numbers, timestamps...). Only a
+    row group or a record batch is held in memory at a time.
+
+    Parameters
+    ----------
+    path: str
+        The file to read. Parquet files can use any compression pyarrow
+        supports. Arrow files can be compressed inside (IPC compression),
+        and Arrow streams also as a whole (.gz, .bz2, .zst or .lz4 after
+        the extension)
+    batch_size: int = 1000
+        The maximum number of rows in a chunk
+    columns: list = None
+        If given, only the columns of this list found in the file are read
+    memory_map: bool = True
+        Wether to memory map the uncompressed Parquet and Arrow files
+        instead of reading them
+
+    Yields
+    ------
+    pd.DataFrame
+        The rows of the chunk, indexed by their position in the file
+    """
+    file_format = table_format(path)
+    if file_format == "csv":
+        yield from pd.read_csv(
+            path, chunksize=batch_size,
+            usecols=None if columns is None else lambda c: c in columns
+        )
+        return
+
+    start = 0
+    for record_batch in iter_record_batches(
+        path, file_format, batch_size, columns, memory_map
+    ):
+        # Record batches of Arrow files can be of any size
+        for offset in range(0, record_batch.num_rows, batch_size):
+            chunk = record_batch.slice(offset, batch_size).to_pandas()
+            chunk.index = pd.RangeIndex(start, start + len(chunk))
+            start += len(chunk)
+            yield chunk
+
+def iter_record_batches(path, file_format, batch_size, columns, memory_map):
+    """Yield the pyarrow RecordBatches of a Parquet or Arrow IPC file
+
+    The file is closed once every batch is read or when the generator is
+    closed before.
+    """
+    pa = import_pyarrow()
+    compressed = path.lower().endswith(compression_extensions)
+
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+        with (pa.memory_map(path) if memory_map else pa.OSFile(path)) as source:
+            parquet_file = pq.ParquetFile(source)
+            names = parquet_file.schema_arrow.names
+            yield from parquet_file.iter_batches(
+                batch_size=batch_size,
+                columns=None if columns is None else [c for c in columns if c in names]
+            )
+        return
+
+    from pyarrow import ipc
+    if compressed:
+        # The streams can't seek back, so the start is read from another one
+        with pa.input_stream(path) as head:
+            is_file_format = head.read(6) == b"ARROW1"
+        if is_file_format:
+            # The random access format would have to be loaded at once
+            raise ValueError(
+                "{} : only Arrow streams can be compressed as a whole, write "
+                "it as a stream or with IPC compression instead".format(path)
+            )
+        source = pa.input_stream(path, buffer_size=1 << 20)
+    else:
+        source = pa.memory_map(path) if memory_map else pa.OSFile(path)
+
+    with source:
+        if not compressed:
+            is_file_format = source.read(6) == b"ARROW1"
+            source.seek(0)
+
+        if is_file_format:
+            reader = ipc.open_file(source)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        else:
+            batches = ipc.open_stream(source)
+
+        for record_batch in batches:
+            if columns is not None:
+                record_batch = record_batch.select(
+                    [c for c in columns if c in record_batch.schema.names]
+                )
+            yield record_batch
+
+def import_pyarrow():
+    """Import pyarrow, only needed for the Parquet and Arrow files"""
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(
+            "pyarrow is needed to read Parquet and Arrow files : pip install pyarrow"
+        ) from e
+    return pyarrow
@@ -0,0 +1,240 @@
+"""Metrics of the imports : requests by api method and time by stage"""
+
+import bisect
+import contextlib
+import json
+import sys
+import threading
+import time
+from .clients import ClientPool
+
+# %%
+class MetricsRegistry:
+    """Collect the count, latency, payload size and errors of the requests
+
+    The requests are counted by api method (add_list_data, search_entities,
+    create_scientific_object...) once a client is instrumented, and the
+    time spent in each stage of the imports (read, transform, upload) is
+    recorded by the imports themselves in the default registry, metrics.
+
+    The results can be exported as a JSON summary or in the Prometheus
+    text format at the end of a run.
+    """
+
+    # Upper bounds in seconds of the buckets of the latency histograms
+    latency_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget everything recorded"""
+        with self.lock:
+            self.calls = {}
+            self.stages = {}
+            self.started_at = time.time()
+
+    def instrument(self, python_client, payload_sizes: bool = True) -> None:
+        """Record the requests sent by a client or every client of a pool
+
+        Parameters
+        ----------
+        python_client: opensilexClientToolsPython.ApiClient | ClientPool
+            The client whose requests are recorded
+        payload_sizes: bool = True
+            Wether to measure the size of the request bodies, which are
+            serialized a second time for that. The size of the responses
+            is read from the last response of the client, so it is only
+            exact when a client isn't shared by several threads (use a
+            ClientPool for that)
+        """
+        if isinstance(python_client, ClientPool):
+            clients = python_client.clients
+        else:
+            clients = [python_client]
+        for client in clients:
+            client.call_api = self._timed_call(client, client.call_api, payload_sizes)
+
+    def record_call(
+        self, method: str, seconds: float, request_bytes: int = 0,
+        response_bytes: int = 0, error: bool = False
+    ) -> None:
+        """Record one request of an api method"""
+        with self.lock:
+            call = self.calls.get(method)
+            if call is None:
+                call = self.calls[method] = {
+                    "count": 0,
+                    "errors": 0,
+                    "seconds": 0.0,
+                    "max_seconds": 0.0,
+                    "request_bytes": 0,
+                    "response_bytes": 0,
+                    "buckets": [0] * (len(self.latency_buckets) + 1),
+                }
+            call["count"] += 1
+            call["errors"] += bool(error)
+            call["seconds"] += seconds
+            call["max_seconds"] = max(call["max_seconds"], seconds)
+            call["request_bytes"] += request_bytes
+            call["response_bytes"] += response_bytes
+            call["buckets"][bisect.bisect_left(self.latency_buckets, seconds)] += 1
+
+    def record_stage(self, stage: str, seconds: float, rows: int = 0) -> None:
+        """Record the time spent in a stage of an import"""
+        with self.lock:
+            entry = self.stages.setdefault(stage, {"count": 0, "seconds": 0.0, "rows": 0})
+            entry["count"] += 1
+            entry["seconds"] += seconds
+            entry["rows"] += rows
+
+    @contextlib.contextmanager
+    def stage(self, stage: str, rows: int = 0):
+        """Time the code run in the with block as a stage"""
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(stage, time.perf_counter() - begin, rows)
+
+    def summary(self) -> dict:
+        """Return everything recorded, with the latency percentiles"""
+        with self.lock:
+            calls = {method: dict(call) for method, call in self.calls.items()}
+            stages = {stage: dict(entry) for stage, entry in self.stages.items()}
+            elapsed = time.time() - self.started_at
+        for call in calls.values():
+            call["mean_seconds"] = call["seconds"] / call["count"]
+            for q in (0.5, 0.95, 0.99):
+                call["p{:g}_seconds".format(100 * q)] = self._quantile(call["buckets"], q)
+            call["buckets"] = dict(zip(
+                [str(b) for b in self.latency_buckets] + ["+Inf"], call["buckets"]
+            ))
+        for entry in stages.values():
+            if entry["rows"] and entry["seconds"]:
+                entry["rows_per_s"] = entry["rows"] / entry["seconds"]
+        return {"elapsed_seconds": elapsed, "api": calls, "stages": stages}
+
+    def to_json(self) -> str:
+        """Return the summary as JSON"""
+        return json.dumps(self.summary(), indent=2)
+
+    def to_prometheus(self, prefix: str = "opensilex_client") -> str:
+        """Return the metrics in the Prometheus text format"""
+        with self.lock:
+            calls = {method: dict(call) for method, call in self.calls.items()}
+            stages = {stage: dict(entry) for stage, entry in self.stages.items()}
+        lines = []
+
+        def add(name, kind, help_text, samples):
+            # samples : (suffix of the name, labels, value)
+            lines.append("# HELP {}_{} {}".format(prefix, name, help_text))
+            lines.append("# TYPE {}_{} {}".format(prefix, name, kind))
+            for suffix, labels, value in samples:
+                label_text = ",".join('{}="{}"'.format(k, v) for k, v in labels)
+                lines.append("{}_{}{}{{{}}} {}".format(
+                    prefix, name, suffix, label_text, value
+                ))
+
+        bounds = [str(b) for b in self.latency_buckets] + ["+Inf"]
+        histogram = []
+        for method, call in sorted(calls.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, call["buckets"]):
+                cumulative += count
+                histogram.append(
+                    ("_bucket", (("method", method), ("le", bound)), cumulative)
+                )
+            histogram.append(("_sum", (("method", method),), call["seconds"]))
+            histogram.append(("_count", (("method", method),), call["count"]))
+        add("request_duration_seconds", "histogram",
+            "Latency of the requests by api method", histogram)
+
+        for name, key, help_text in [
+            ("request_errors_total", "errors", "Number of failed requests"),
+            ("request_bytes_total", "request_bytes", "Size of the request bodies"),
+            ("response_bytes_total", "response_bytes", "Size of the responses"),
+        ]:
+            add(name, "counter", help_text, [
+                ("", (("method", method),), call[key])
+                for method, call in sorted(calls.items())
+            ])
+
+        for name, key, help_text in [
+            ("stage_seconds_total", "seconds", "Time spent in each stage of the imports"),
+            ("stage_rows_total", "rows", "Rows handled by each stage of the imports"),
+        ]:
+            add(name, "counter", help_text, [
+                ("", (("stage", stage),), entry[key])
+                for stage, entry in sorted(stages.items())
+            ])
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str) -> None:
+        """Write the metrics to a file, in the Prometheus text format if
+        its extension is .prom or .txt and as JSON otherwise"""
+        text = self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json()
+        with open(path, "w") as f:
+            f.write(text)
+
+    def _quantile(self, buckets, q):
+        # Upper bound of the bucket holding the quantile
+        total = sum(buckets)
+        seen = 0
+        for bound, count in zip(list(self.latency_buckets) + [float("inf")], buckets):
+            seen += count
+            if seen >= q * total:
+                return bound
+        return float("inf")
+
+    def _timed_call(self, client, call_api, payload_sizes):
+        def timed_call_api(*args, **kwargs):
+            method = api_method_name(args, kwargs)
+            request_bytes = payload_size(client, kwargs.get("body")) if payload_sizes else 0
+            begin = time.perf_counter()
+            error = False
+            try:
+                return call_api(*args, **kwargs)
+            except Exception:
+                error = True
+                raise
+            finally:
+                response = getattr(client, "last_response", None)
+                self.record_call(
+                    method, time.perf_counter() - begin, request_bytes,
+                    len(getattr(response, "data", None) or b"") if not error else 0,
+                    error
+                )
+        return timed_call_api
+
+def api_method_name(args, kwargs) -> str:
+    """Return the name of the api method sending a request
+
+    The generated api methods all send their request from a
+    <method>_with_http_info function, found by going up the stack. The
+    http method and path are used if there is none.
+    """
+    frame = sys._getframe(2)
+    for _ in range(10):
+        if frame is None:
+            break
+        name = frame.f_code.co_name
+        if name.endswith("_with_http_info"):
+            return name[:-len("_with_http_info")]
+        frame = frame.f_back
+    path = args[0] if args else kwargs.get("resource_path", "?")
+    http_method = args[1] if len(args) > 1 else kwargs.get("method", "?")
+    return "{} {}".format(http_method, path)
+
+def payload_size(client, body) -> int:
+    """Return the size in bytes of a request body once serialized"""
+    if body is None:
+        return 0
+    try:
+        return len(json.dumps(client.sanitize_for_serialization(body)))
+    except Exception:
+        return 0
+
+# Registry used by the imports for their stages
+metrics = MetricsRegistry()
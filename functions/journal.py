@@ -0,0 +1,117 @@
+"""Journal of the rows already imported, to resume an interrupted import"""
+
+import pandas as pd
+import sqlite3
+import threading
+from datetime import datetime
+
+# %%
+class ImportJournal:
+    """Persistent journal of the rows sent by the imports
+
+    The outcome of each batch (or each row for scientific objects) is saved
+    in a SQLite database, keyed by the imported source and the rows of the
+    batch. When an import is run again with the same journal, the rows 
+    already done are skipped and the import continues where it stopped.
+
+    Parameters
+    ----------
+    path: str = "import_journal.sqlite"
+        The path of the SQLite database, created if needed
+    """
+
+    # Statuses of the rows that don't need to be sent again
+    done_statuses = ("sent", "partial", "rejected", "created", "existed", "updated")
+
+    def __init__(self, path="import_journal.sqlite"):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute(
+                """CREATE TABLE IF NOT EXISTS batches (
+                    source TEXT NOT NULL,
+                    first_row INTEGER NOT NULL,
+                    last_row INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    error TEXT,
+                    recorded_at TEXT NOT NULL,
+                    PRIMARY KEY (source, first_row, last_row)
+                )"""
+            )
+
+    def is_done(self, source: str, first_row: int, last_row: int) -> bool:
+        """Check if rows first_row to last_row were all done by a batch"""
+        with self.lock:
+            done = self.connection.execute(
+                """SELECT 1 FROM batches
+                WHERE source = ? AND first_row <= ? AND last_row >= ?
+                AND status IN ({})
+                LIMIT 1""".format(",".join("?" * len(self.done_statuses))),
+                (source, int(first_row), int(last_row)) + self.done_statuses
+            ).fetchone()
+        return done is not None
+
+    def has_outcomes(self, source: str) -> bool:
+        """Check if outcomes were saved for a source, i.e. it is resumed"""
+        with self.lock:
+            found = self.connection.execute(
+                "SELECT 1 FROM batches WHERE source = ? LIMIT 1", (source,)
+            ).fetchone()
+        return found is not None
+
+    def done_rows(self, source: str, first_row: int, last_row: int) -> set:
+        """Return the rows of first_row to last_row done by smaller batches
+
+        A batch interrupted after some of its rows were sent records them
+        on their own, so they are skipped when it is sent again.
+        """
+        with self.lock:
+            ranges = self.connection.execute(
+                """SELECT first_row, last_row FROM batches
+                WHERE source = ? AND first_row <= ? AND last_row >= ?
+                AND status IN ({})""".format(",".join("?" * len(self.done_statuses))),
+                (source, int(last_row), int(first_row)) + self.done_statuses
+            ).fetchall()
+        rows = set()
+        for first, last in ranges:
+            rows.update(range(max(first, first_row), min(last, last_row) + 1))
+        return rows
+
+    def record(
+        self, source: str, first_row: int, last_row: int, status: str, error: str = None
+    ) -> None:
+        """Save the outcome of the batch of rows first_row to last_row"""
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO batches VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    source, int(first_row), int(last_row), status, error,
+                    datetime.now().isoformat()
+                )
+            )
+
+    def record_rows(
+        self, source: str, rows: list, status: str, error: str = None
+    ) -> None:
+        """Save the outcome of some rows, one record per run of consecutive rows"""
+        rows = sorted(rows)
+        first = 0
+        for i in range(1, len(rows) + 1):
+            if i == len(rows) or rows[i] != rows[i - 1] + 1:
+                self.record(source, rows[first], rows[i - 1], status, error)
+                first = i
+
+    def outcomes(self, source: str) -> pd.DataFrame:
+        """Return the outcomes saved for a source"""
+        with self.lock:
+            return pd.read_sql_query(
+                "SELECT * FROM batches WHERE source = ? ORDER BY first_row",
+                self.connection,
+                params=(source,)
+            )
+
+    def close(self) -> None:
+        """Close the database"""
+        with self.lock:
+            self.connection.close()
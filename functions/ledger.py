@@ -0,0 +1,106 @@
+"""Outcomes of the imports, kept in memory or streamed to csv files"""
+
+import pandas as pd
+import os
+import threading
+from collections import Counter
+
+# %%
+class OutcomeLedger:
+    """Collect the outcome of each row of an import
+
+    The rows are kept as records and only turned into DataFrames or csv 
+    files at the end, so the cost of recording a row doesn't depend on how
+    many rows were recorded before.
+
+    Parameters
+    ----------
+    paths: dict
+        The csv file to write for each outcome
+        Example : {'created':'variables_created.csv', 'failed':'failed.csv'}
+    columns: dict
+        The columns of each outcome. Without streaming, keys of the records
+        that aren't in these columns are added after them
+    stream: bool = False
+        Wether to append the records to the csv files while the import 
+        runs (every flush_every records) instead of writing them at the end
+    keep_in_memory: bool = True
+        Wether to also keep the records in memory when streaming. If False 
+        the records are read back from the csv files when needed
+    flush_every: int = 1000
+        The number of records of an outcome held before they are appended 
+        to its csv file when streaming
+    append: bool = False
+        Wether to append the records to the csv files that already exist
+        when streaming, instead of starting them again (to resume an import)
+    """
+
+    def __init__(
+        self, paths, columns, stream=False, keep_in_memory=True, flush_every=1000,
+        append=False
+    ):
+        self.paths = paths
+        self.columns = columns
+        self.stream = stream
+        self.keep_in_memory = keep_in_memory or not stream
+        self.flush_every = flush_every
+        self.lock = threading.Lock()
+
+        # Number of records of each outcome
+        self.counts = Counter()
+
+        # Records kept in memory and records waiting to be written
+        self.records = {outcome: [] for outcome in paths}
+        self.pending = {outcome: [] for outcome in paths}
+
+        # Start the csv files with their header
+        if self.stream:
+            for outcome, path in paths.items():
+                if not (append and os.path.exists(path)):
+                    pd.DataFrame(columns=columns[outcome]).to_csv(path, index=False)
+
+    def record(self, outcome: str, record: dict) -> None:
+        """Record the outcome of one row"""
+        with self.lock:
+            self.counts[outcome] += 1
+            if self.keep_in_memory:
+                self.records[outcome].append(record)
+            if self.stream:
+                self.pending[outcome].append(record)
+                if len(self.pending[outcome]) >= self.flush_every:
+                    self._flush(outcome)
+
+    def flush(self) -> None:
+        """Append the pending records to the csv files when streaming"""
+        with self.lock:
+            for outcome in self.pending:
+                self._flush(outcome)
+
+    def close(self) -> None:
+        """Write everything that isn't written yet to the csv files"""
+        if self.stream:
+            self.flush()
+        else:
+            for outcome, path in self.paths.items():
+                self.frame(outcome).to_csv(path, index=False)
+
+    def frame(self, outcome: str) -> pd.DataFrame:
+        """Return the records of an outcome as a DataFrame"""
+        if not self.keep_in_memory:
+            self.flush()
+            return pd.read_csv(self.paths[outcome])
+        with self.lock:
+            records = list(self.records[outcome])
+        columns = self.columns[outcome]
+        if self.stream:
+            return pd.DataFrame(records, columns=columns)
+        df = pd.DataFrame(records)
+        return df.reindex(
+            columns=list(columns) + [col for col in df.columns if col not in columns]
+        )
+
+    def _flush(self, outcome):
+        if self.pending[outcome]:
+            pd.DataFrame(self.pending[outcome], columns=self.columns[outcome])\
+                .to_csv(self.paths[outcome], mode="a", header=False, index=False)
+            self.pending[outcome] = []
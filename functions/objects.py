@@ -0,0 +1,360 @@
+"""Creation and update of scientific objects"""
+
+import opensilexClientToolsPython
+import pandas as pd
+import logging
+import os
+import time
+from pydantic import validate_arguments
+from .clients import PythonClient
+from .files import iter_table_chunks
+from .journal import ImportJournal
+from .instrumentation import metrics
+from .plans import ImportPlan
+from .sheets import download_sheet, sheet_csv_url
+from .utils import is_last_page, map_bounded
+
+def update_objects_from_googlesheet(
+    python_client, spreadsheet_url, gid_number, max_workers=1, journal=None
+):
+    variables_url = sheet_csv_url(spreadsheet_url, gid_number)
+    object_csv = pd.read_csv(download_sheet(variables_url))
+    return create_update_objects(
+        python_client, object_csv, True, max_workers=max_workers,
+        journal=journal, source=variables_url
+    )
+
+def update_objects_from_csv(python_client, csv_path, max_workers=1, journal=None):
+    object_csv = pd.read_csv(csv_path)
+    return create_update_objects(
+        python_client, object_csv, True, max_workers=max_workers,
+        journal=journal, source=os.path.abspath(csv_path)
+    )
+
+ 
+def update_objects(python_client, object_csv, max_workers=1, journal=None, source=None):
+    return create_update_objects(
+        python_client, object_csv, True, max_workers=max_workers,
+        journal=journal, source=source
+    )
+
+def create_objects_from_googlesheet(
+    python_client, spreadsheet_url, gid_number, max_workers=1, journal=None
+):
+    variables_url = sheet_csv_url(spreadsheet_url, gid_number)
+    object_csv = pd.read_csv(download_sheet(variables_url))
+    return create_update_objects(
+        python_client, object_csv, False, max_workers=max_workers,
+        journal=journal, source=variables_url
+    )
+
+def create_objects_from_csv(python_client, csv_path, max_workers=1, journal=None):
+    object_csv = pd.read_csv(csv_path)
+    return create_update_objects(
+        python_client, object_csv, False, max_workers=max_workers,
+        journal=journal, source=os.path.abspath(csv_path)
+    )
+
+def create_objects_from_file(
+    python_client, path, max_workers=1, journal=None, batch_size=10000,
+    memory_map=True
+):
+    return create_update_objects_from_file(
+        python_client, path, False, max_workers=max_workers, journal=journal,
+        batch_size=batch_size, memory_map=memory_map
+    )
+
+def update_objects_from_file(
+    python_client, path, max_workers=1, journal=None, batch_size=10000,
+    memory_map=True
+):
+    return create_update_objects_from_file(
+        python_client, path, True, max_workers=max_workers, journal=journal,
+        batch_size=batch_size, memory_map=memory_map
+    )
+
+# Columns of the scientific objects read from the imported files
+object_columns = ["uri", "type", "name", "experimentUri"]
+
+def create_update_objects_from_file(
+    python_client, path, update, max_workers=1, journal=None, batch_size=10000,
+    memory_map=True
+):
+    """Create or update the scientific objects of a csv, Parquet or Arrow file
+
+    The file is read and sent batch_size rows at a time (see 
+    iter_table_chunks), so huge files don't need to fit in memory.
+
+    Parameters
+    ----------
+    python_client: opensilexClientToolsPython.ApiClient | ClientPool
+        The authenticated client to connect to Opensilex
+    path: str
+        The file to import, its format is given by its extension (see
+        table_format)
+    update: bool
+        Wether to update existing objects instead of creating new ones
+    max_workers: int = 1
+        The maximum number of requests sent at the same time
+    journal: ImportJournal = None
+        The journal to skip the rows already done and to save the outcomes
+        in (see create_update_objects)
+    batch_size: int = 10000
+        The number of rows read at a time
+    memory_map: bool = True
+        Wether to memory map the uncompressed Parquet and Arrow files
+
+    Returns
+    -------
+    pd.DataFrame
+        The outcome of each object (see create_update_objects), the rows 
+        being numbered across the whole file
+    """
+    reports = [
+        create_update_objects(
+            python_client, chunk, update, max_workers=max_workers,
+            journal=journal, source=os.path.abspath(path)
+        )
+        for chunk in iter_table_chunks(
+            path, batch_size=batch_size, columns=object_columns,
+            memory_map=memory_map
+        )
+    ]
+    if not reports:
+        return pd.DataFrame(columns=object_report_columns)
+    return pd.concat(reports, ignore_index=True)
+
+# Columns of the outcome table returned by create_update_objects
+object_report_columns = ["row", "uri", "name", "status", "error"]
+
+@validate_arguments(config=dict(arbitrary_types_allowed=True))
+def create_update_objects(
+    python_client: PythonClient, object_csv: pd.DataFrame, update: bool,
+    max_workers: int = 1, journal: ImportJournal = None, source: str = None,
+    plan: ImportPlan = None
+):
+    """Create or update scientific objects from a pandas.DataFrame
+
+    A failing object is reported and the import goes on with the others.
+
+    Parameters
+    ----------
+    python_client: opensilexClientToolsPython.ApiClient | ClientPool
+        The authenticated client to connect to Opensilex
+    object_csv: pd.DataFrame
+        A pandas DataFrame with the columns "uri", "type", "name" and
+        "experimentUri"
+    update: bool
+        Wether to update existing objects instead of creating new ones
+    max_workers: int = 1
+        The maximum number of requests sent at the same time
+    journal: ImportJournal = None
+        If given, the outcome of each row is saved in this journal and the
+        rows it already records as done are skipped
+    source: str = None
+        The name of the imported file or sheet in the journal (required
+        with a journal)
+    plan: ImportPlan = None
+        The plan made by plan_objects for this DataFrame. Only the rows it
+        plans to create or update send a request, the others are reported
+        as "existed" or "failed" directly
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per object with its row in object_csv, its uri, its name,
+        its status ("created", "existed", "updated", "failed" or "skipped"
+        if the journal records it as done) and the error if any
+    """
+    if journal is not None and source is None:
+        raise ValueError("A source is needed to use a journal")
+
+    os_api = opensilexClientToolsPython.ScientificObjectsApi(python_client)
+
+    logging.info(str(len(object_csv)) + " objects")
+    rows = zip(
+        object_csv.index, object_csv["uri"], object_csv["type"],
+        object_csv["name"], object_csv["experimentUri"]
+    )
+
+    outcomes = []
+    for outcome in map_bounded(
+        lambda row: send_scientific_object(
+            os_api, update, *row, journal, source, plan
+        ),
+        rows,
+        max_workers=max_workers
+    ):
+        outcomes.append(outcome)
+        if len(outcomes) % 100 == 0:
+            logging.debug(str(len(outcomes)) + "/" + str(len(object_csv)))
+
+    report = pd.DataFrame(outcomes, columns=object_report_columns)\
+        .sort_values("row", ignore_index=True)
+    logging.info("scientific objects : {}".format(
+        report.status.value_counts().to_dict()
+    ))
+    return report
+
+def send_scientific_object(
+    os_api, update, index, uri, rdf_type, name, experiment, journal=None,
+    source=None, plan=None
+):
+    """Create or update one scientific object and report how it went
+
+    Parameters
+    ----------
+    os_api: opensilexClientToolsPython.ScientificObjectsApi
+        The api used to send the object
+    update: bool
+        Wether to update the object instead of creating it
+    index:
+        The row of the object in the imported DataFrame
+    uri, rdf_type, name, experiment:
+        The attributes of the object
+    journal: ImportJournal = None
+        The journal to skip the object if done and to save its outcome in
+    source: str = None
+        The name of the imported file or sheet in the journal
+    plan: ImportPlan = None
+        The plan to follow : the object is only sent if it is planned to
+        be created or updated
+
+    Returns
+    -------
+    dict
+        The outcome of the object (see object_report_columns)
+    """
+    uri = None if pd.isna(uri) else uri
+    outcome = {"row": index, "uri": uri, "name": name, "status": None, "error": None}
+    if journal is not None and journal.is_done(source, index, index):
+        outcome["status"] = "skipped"
+        return outcome
+    action = plan.action("scientific_object", index) if plan is not None else None
+    try:
+        if action == "skip":
+            outcome["status"] = "existed"
+        elif action == "fail":
+            outcome["status"] = "failed"
+            outcome["error"] = "Scientific object not found : {}".format(uri)
+        else:
+            # Built here so a row refused by the DTO (missing name or type)
+            # only fails that row
+            new_os = opensilexClientToolsPython.ScientificObjectCreationDTO(
+                uri=uri,
+                rdf_type=rdf_type,
+                name=name,
+                experiment=experiment
+            )
+            with metrics.stage("objects.upload", 1):
+                if update is None or update is False:
+                    result = os_api.create_scientific_object(body=new_os)
+                    outcome["uri"] = result.get("result")[0]
+                    outcome["status"] = "created"
+                else:
+                    os_api.update_scientific_object(body=new_os)
+                    outcome["status"] = "updated"
+    except Exception as e:
+        if "exists" not in str(e) and "duplicate" not in str(e):
+            logging.error("Exception on row {} : {}\n".format(index, e))
+            outcome["status"] = "failed"
+            outcome["error"] = str(e)
+        else:
+            logging.debug("scientific object " + str(name) + " exists")
+            outcome["status"] = "existed"
+    if journal is not None:
+        journal.record(source, index, index, outcome["status"], outcome["error"])
+    return outcome
+
+@validate_arguments(config=dict(arbitrary_types_allowed=True))
+def plan_objects(
+    python_client: PythonClient, object_csv: pd.DataFrame, update: bool,
+    journal: ImportJournal = None, source: str = None, page_size: int = 1000
+) -> ImportPlan:
+    """Plan the creation or update of scientific objects without sending any
+
+    The objects of the experiments of object_csv are read at once and the
+    rows are compared to them, so the plan can be reviewed as a dry run and
+    then given to create_update_objects.
+
+    Parameters
+    ----------
+    python_client: opensilexClientToolsPython.ApiClient | ClientPool
+        The authenticated client to connect to Opensilex
+    object_csv: pd.DataFrame
+        A pandas DataFrame with the columns "uri", "type", "name" and
+        "experimentUri"
+    update: bool
+        Wether the objects will be updated instead of created
+    journal: ImportJournal = None
+        If given, the rows it records as done are planned as skipped
+    source: str = None
+        The name of the imported file or sheet in the journal
+    page_size: int = 1000
+        The number of objects fetched by each search request
+
+    Returns
+    -------
+    ImportPlan
+        One action per row : "create" or "update" (one request), "skip" if
+        the object to create already exists, the object to update already
+        has the name and type of the row or the journal records it as done,
+        or "fail" if the object to update doesn't exist
+    """
+    if journal is not None and source is None:
+        raise ValueError("A source is needed to use a journal")
+
+    os_api = opensilexClientToolsPython.ScientificObjectsApi(python_client)
+
+    # Snapshot of the name and type of the objects of every experiment
+    # imported, by uri
+    begin = time.perf_counter()
+    existing = {}
+    snapshot_requests = 0
+    for experiment in object_csv["experimentUri"].dropna().unique():
+        page = 0
+        while True:
+            res = os_api.search_scientific_objects(
+                experiment=experiment, page=page, page_size=page_size
+            )
+            snapshot_requests += 1
+            existing.update(
+                (o.uri, {"name": o.name, "rdf_type": o.rdf_type})
+                for o in res["result"]
+            )
+            if is_last_page(res, page, page_size):
+                break
+            page += 1
+    snapshot_seconds = time.perf_counter() - begin
+
+    records = []
+    for index, uri, rdf_type, name in zip(
+        object_csv.index, object_csv["uri"], object_csv["type"],
+        object_csv["name"]
+    ):
+        uri = None if pd.isna(uri) else uri
+        if journal is not None and journal.is_done(source, index, index):
+            action = "skip"
+        elif update:
+            if uri not in existing:
+                action = "fail"
+            elif existing[uri] == {"name": name, "rdf_type": rdf_type}:
+                action = "skip"
+            else:
+                action = "update"
+        else:
+            action = "skip" if uri in existing else "create"
+        records.append({
+            "kind": "scientific_object", "row": index, "uri": uri,
+            "name": name, "action": action,
+            "requests": int(action in ("create", "update"))
+        })
+
+    plan = ImportPlan.from_records(
+        records,
+        snapshot={"objects": existing},
+        snapshot_requests=snapshot_requests,
+        snapshot_seconds=snapshot_seconds
+    )
+    logging.info("scientific objects plan : {} requests".format(plan.requests))
+    return plan
@@ -0,0 +1,113 @@
+"""Plans of the requests an import will send, computed before sending any"""
+
+import pandas as pd
+from .instrumentation import metrics
+
+# Columns of the actions of a plan
+plan_columns = ["kind", "row", "uri", "name", "action", "requests"]
+
+# %%
+class ImportPlan:
+    """What an import would do, diffed against a snapshot of opensilex
+
+    A plan is made by plan_variables or plan_objects, which only send read
+    requests, so it can be used as a dry run. Given to migrate_variables
+    or create_update_objects it is applied without searching opensilex
+    again : only the creations and updates it lists send requests.
+
+    Parameters
+    ----------
+    actions: pd.DataFrame
+        One row per object with the columns of plan_columns : its kind
+        (entity, variable, scientific_object...), its row in the imported
+        DataFrame, its uri and name, the action ("create", "update", "skip"
+        or "fail") and the number of requests the action sends
+    snapshot: dict = None
+        What was read from opensilex, reused when applying the plan
+    snapshot_requests: int = 0
+        The number of requests sent to take the snapshot
+    snapshot_seconds: float = 0
+        The time spent taking the snapshot
+    """
+
+    def __init__(
+        self, actions, snapshot=None, snapshot_requests=0, snapshot_seconds=0.0
+    ):
+        self.actions = actions
+        self.snapshot = snapshot or {}
+        self.snapshot_requests = snapshot_requests
+        self.snapshot_seconds = snapshot_seconds
+
+    @classmethod
+    def from_records(cls, records, **kwargs) -> "ImportPlan":
+        """Return a plan whose actions are the given dicts"""
+        return cls(pd.DataFrame(records, columns=plan_columns), **kwargs)
+
+    @property
+    def requests(self) -> int:
+        """The number of requests needed to apply the plan"""
+        return int(self.actions["requests"].sum())
+
+    def counts(self) -> pd.DataFrame:
+        """Return the number of objects of each kind by action"""
+        return pd.crosstab(self.actions["kind"], self.actions["action"])
+
+    def action(self, kind: str, row) -> str:
+        """Return the action planned for a row, or None if it isn't planned"""
+        if not hasattr(self, "_by_row"):
+            self._by_row = dict(zip(
+                zip(self.actions["kind"], self.actions["row"]),
+                self.actions["action"]
+            ))
+        return self._by_row.get((kind, row))
+
+    def seconds_per_request(self) -> float:
+        """The expected latency of a request
+
+        The mean latency recorded by metrics if a client was instrumented,
+        else the mean time of the snapshot requests.
+        """
+        calls = metrics.summary()["api"].values()
+        count = sum(call["count"] for call in calls)
+        if count:
+            return sum(call["seconds"] for call in calls) / count
+        if self.snapshot_requests:
+            return self.snapshot_seconds / self.snapshot_requests
+        return 0.0
+
+    def estimate_seconds(
+        self, seconds_per_request: float = None, max_workers: int = 1
+    ) -> float:
+        """Estimate how long applying the plan will take
+
+        Parameters
+        ----------
+        seconds_per_request: float = None
+            The latency of a request (see seconds_per_request by default)
+        max_workers: int = 1
+            The number of requests sent at the same time when applying
+
+        Returns
+        -------
+        float
+            The estimated duration in seconds
+        """
+        if seconds_per_request is None:
+            seconds_per_request = self.seconds_per_request()
+        return self.requests * seconds_per_request / max(1, max_workers)
+
+    def describe(self) -> str:
+        """Return a readable summary of the plan"""
+        lines = ["{} requests to apply the plan ({} sent for the snapshot)".format(
+            self.requests, self.snapshot_requests
+        )]
+        for kind, actions in self.actions.groupby("kind", sort=False):
+            lines.append("  {} : {}".format(kind, ", ".join(
+                "{} {}".format(action, count)
+                for action, count in actions["action"].value_counts().items()
+            )))
+        lines.append("estimated duration : {:.1f} s".format(self.estimate_seconds()))
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return "<ImportPlan\n{}>".format(self.describe())
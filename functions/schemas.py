@@ -0,0 +1,146 @@
+"""Schemas describing the columns of the variables sheets"""
+
+import pandas as pd
+
+# %%
+# Default schema, used by the variables functions when none is given
+# Format is 'opensilexname':'columnname'
+# or 'opensilexsubtype':{'opensilexname':'columnname'}
+DEFAULT_VARIABLES_SCHEMA = {
+    'trait':'trait.uri',
+    'trait_name':'trait.label',
+    'entity':{
+        'name':'entity.label',
+        'uri':'entity.uri',
+        'description':'entity.comment'
+    },
+    'characteristic':{
+        'name':'characteristic.label',
+        'uri':'characteristic.uri',
+        'description':'characteristic.comment'
+    },
+    'method':{
+        'name':'method.label',
+        'uri':'method.uri',
+        'description':'method.comment'
+    },
+    'unit':{
+        'name':'unit.label',
+        'uri':'unit.uri',
+        'description':'unit.comment'
+    },
+    'uri':'variable.uri',
+    'name':'variable.label',
+    'description':'variable.description',
+    'datatype':'variable.datatype',
+    'alternative_name':'variable.alternative_name',
+    'time_interval':'variable.timeinterval',
+    'sampling_interval':'variable.sampleinterval'
+}
+
+# %%
+# Define full schema : the default one with every attribute opensilex knows
+match_schema = {
+    'exact_match':'exact_match',
+    'close_match':'close_match',
+    'broad_match':'broad_match',
+    'narrow_match':'narrow_match'
+}
+
+full_schema = {
+    key: (
+        {**val, **match_schema} if key != 'unit'
+        else {
+            **val,
+            'symbol':'symbol',
+            'alternative_symbol':'alternative_symbol',
+            **match_schema
+        }
+    ) if type(val) == dict else val
+    for key, val in DEFAULT_VARIABLES_SCHEMA.items()
+}
+full_schema.update(match_schema)
+
+# %%
+class VariablesSchema:
+    """A variables_schema compiled to be applied to DataFrames
+
+    The schema is read once : its columns, the components (entity,
+    characteristic, method, unit) and the attributes of each one are
+    precomputed so a whole DataFrame is checked and selected at once.
+
+    Parameters
+    ----------
+    schema: dict = DEFAULT_VARIABLES_SCHEMA
+        Dictionnary that describes the header of the DataFrame in
+        correspondance with the names in opensilex.
+        Format is 'opensilexname':'columnname'
+        or 'opensilexsubtype':{'opensilexname':'columnname'}
+    """
+
+    def __init__(self, schema: dict = DEFAULT_VARIABLES_SCHEMA):
+        self.schema = schema
+
+        # Attributes of the variables : {'opensilexname':'columnname'}
+        self.fields = {
+            key: val for key, val in schema.items() if type(val) != dict
+        }
+
+        # Components : {'opensilexsubtype':{'opensilexname':'columnname'}}
+        self.components = {
+            key: dict(val) for key, val in schema.items() if type(val) == dict
+        }
+
+        # Flattened columns and their (opensilexname, attribute) labels,
+        # attribute being "" for the attributes of the variables
+        self.columns = []
+        labels = []
+        for key, val in schema.items():
+            if type(val) == dict:
+                self.columns += list(val.values())
+                labels += [(key, name) for name in val]
+            else:
+                self.columns.append(val)
+                labels.append((key, ""))
+        self.labels = pd.MultiIndex.from_tuples(labels)
+
+    @classmethod
+    def compile(cls, schema) -> "VariablesSchema":
+        """Return the schema compiled, unless it already is"""
+        if isinstance(schema, cls):
+            return schema
+        return cls(schema)
+
+    def keys(self) -> list:
+        """Return the opensilex names of the schema, in order"""
+        return list(self.schema)
+
+    def check(self, df: pd.DataFrame) -> None:
+        """Raise a ValueError if columns of the schema are missing in df"""
+        col_match = [
+            col
+            for col in dict.fromkeys(self.columns)
+            if col not in df.columns
+        ]
+        if col_match:
+            raise ValueError(
+                """The following names in the schema couldn't be matched to any columns :
+    {0}
+The actual columns found are :
+    {1}
+            """.format(col_match, df.columns)
+            )
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Select and rename the columns of the schema in one pass
+
+        Returns
+        -------
+        pd.DataFrame
+            The columns of the schema labelled (opensilexname, attribute) :
+            result["entity"] is the DataFrame of the entities with the
+            opensilex names as columns and result[("datatype", "")] is the
+            column of the datatypes
+        """
+        self.check(df)
+        return df[self.columns].set_axis(self.labels, axis=1)
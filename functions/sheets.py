@@ -0,0 +1,142 @@
+"""Download of googlesheets, cached on disk between runs unless private"""
+
+import requests
+import requests.adapters
+import json
+import hashlib
+import time
+import logging
+import os
+import threading
+
+# %%
+# Folder where the downloaded googlesheets are kept between runs
+sheet_cache_dir = os.path.join(
+    os.path.expanduser("~"), ".cache", "opensilex-ws-python-client", "sheets"
+)
+
+sheet_session_lock = threading.Lock()
+sheet_session = None
+
+def get_sheet_session() -> requests.Session:
+    """Return the session shared by all the googlesheet downloads
+
+    The session keeps its connections open, so successive downloads
+    don't pay for a new TLS handshake each time.
+    """
+    global sheet_session
+    with sheet_session_lock:
+        if sheet_session is None:
+            sheet_session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=4, pool_maxsize=8, max_retries=3
+            )
+            sheet_session.mount("https://", adapter)
+            sheet_session.mount("http://", adapter)
+        return sheet_session
+
+def sheet_csv_url(spreadsheet_url: str, gid_number) -> str:
+    """Return the url of the csv export of a sheet of a googlesheet"""
+    return spreadsheet_url + "/gviz/tq?tqx=out:csv&gid=" + str(gid_number)
+
+def fetch_sheet(url: str, timeout: float = 60) -> bytes:
+    """Download a csv export without keeping it on disk
+
+    Used for the sheets holding personal data (emails, passwords...),
+    which shouldn't be left in the cache.
+
+    Parameters
+    ----------
+    url: str
+        The url of the csv export
+    timeout: float = 60
+        Timeout of the request in seconds
+
+    Returns
+    -------
+    bytes
+        The content of the csv export
+    """
+    response = get_sheet_session().get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.content
+
+def download_sheet(
+    url: str, cache_dir: str = None, max_age: float = 0, timeout: float = 60
+) -> str:
+    """Download a csv export once and keep it in the local cache
+
+    The file is saved in cache_dir along with the ETag and Last-Modified
+    headers of the response. The next downloads of the same url send them
+    back in a conditional request, and the cached file is reused as is
+    when the server answers 304 Not Modified. The cached file is also used
+    when the server can't be reached, but an error status (403, 404...)
+    is raised as for any other download.
+
+    Parameters
+    ----------
+    url: str
+        The url of the csv export (see sheet_csv_url)
+    cache_dir: str = None
+        The folder of the cache, sheet_cache_dir by default
+    max_age: float = 0
+        How long in seconds a cached file is used without asking the
+        server at all
+    timeout: float = 60
+        Timeout of the request in seconds
+
+    Returns
+    -------
+    str
+        The path of the cached csv file
+    """
+    cache_dir = cache_dir or sheet_cache_dir
+    os.makedirs(cache_dir, exist_ok=True)
+    key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    csv_path = os.path.join(cache_dir, key + ".csv")
+    meta_path = os.path.join(cache_dir, key + ".json")
+
+    meta = {}
+    if os.path.exists(csv_path) and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if time.time() - meta.get("fetched_at", 0) < max_age:
+            logging.debug("using cached sheet " + url)
+            return csv_path
+
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        response = get_sheet_session().get(url, headers=headers, timeout=timeout)
+    except (requests.ConnectionError, requests.Timeout) as e:
+        if meta:
+            logging.warning(
+                "Could not reach {} ({}), using the cached copy".format(url, e)
+            )
+            return csv_path
+        raise
+    response.raise_for_status()
+
+    if response.status_code == 304:
+        logging.debug("sheet not modified " + url)
+    else:
+        # Write to a temporary file first so an interrupted download never
+        # leaves a truncated csv in the cache
+        tmp_path = csv_path + ".part"
+        with open(tmp_path, "wb") as f:
+            f.write(response.content)
+        os.replace(tmp_path, csv_path)
+        logging.debug("downloaded sheet {} ({} bytes)".format(url, len(response.content)))
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified")
+        }
+    meta["fetched_at"] = time.time()
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+    return csv_path
@@ -0,0 +1,121 @@
+"""Small helpers shared by the imports"""
+
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+
+# %%
+def is_empty(value: str) -> bool:
+    """Check for emptyness
+
+    Parameters
+    ----------
+    value : either None or str
+
+    Returns
+    -------
+    bool
+        True if empty, False if not
+    """
+
+    # Check for None, or equivalents : "NA", "nan" (float nan too)
+    if value is None or value != value:
+        return True
+    if(value == "NA" or value == None or value == "nan"):
+        return True
+    return False
+
+def format_comment(comment: str) -> str:
+    """Format comment
+
+    Parameters
+    ----------
+    raw_comment : str
+
+    Returns
+    -------
+    str
+        The comment in str type or "No description" if found empty
+    """
+    
+    if(is_empty(comment)):
+        return "No description"
+
+    return str(comment)
+
+# %%
+def page_count(response: dict, page_size: int) -> int:
+    """Return the number of pages of a search from its pagination metadata
+
+    Parameters
+    ----------
+    response: dict
+        A page returned by a search function of opensilexClientToolsPython
+    page_size: int
+        The page size the search was sent with
+
+    Returns
+    -------
+    int
+        The number of pages, or None if the response has no pagination
+        metadata
+    """
+    try:
+        pagination = response["metadata"]["pagination"]
+    except (KeyError, TypeError):
+        return None
+    if not isinstance(pagination, dict):
+        return None
+    if pagination.get("totalPages") is not None:
+        return int(pagination["totalPages"])
+    if pagination.get("totalCount") is not None:
+        size = pagination.get("pageSize") or page_size
+        return -(-int(pagination["totalCount"]) // int(size))
+    return None
+
+def is_last_page(response: dict, page: int, page_size: int) -> bool:
+    """Check wether a page of a search is the last one
+
+    The pagination metadata is used when the response has some. Without
+    it, a page shorter than page_size is taken as the last one.
+    """
+    pages = page_count(response, page_size)
+    if pages is not None:
+        return page + 1 >= pages
+    return len(response["result"]) < page_size
+
+# %%
+def map_bounded(func, items, max_workers=1):
+    """Apply a function to every item, using a pool of threads if needed
+
+    The items are taken lazily : at most twice max_workers items are read
+    ahead of the workers, so a large stream is never loaded all at once.
+
+    Parameters
+    ----------
+    func: Callable
+        The function to apply
+    items: Iterable
+        The items to apply it to
+    max_workers: int = 1
+        The maximum number of calls running at the same time. With a single
+        worker everything runs in the calling thread
+
+    Yields
+    ------
+    The results of the calls, in the order they complete
+    """
+    if max_workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for item in items:
+            # Wait for a slot before reading more items
+            if len(pending) >= 2 * max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(executor.submit(func, item))
+        for future in as_completed(pending):
+            yield future.result()
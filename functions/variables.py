@@ -0,0 +1,1297 @@
+"""Import and export of variables and their components"""
+
+import opensilexClientToolsPython
+import re
+import pandas as pd
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union
+from pydantic import validate_arguments
+from .clients import PythonClient
+from .ledger import OutcomeLedger
+from .plans import ImportPlan
+from .instrumentation import metrics
+from .schemas import DEFAULT_VARIABLES_SCHEMA, VariablesSchema, full_schema
+from .sheets import download_sheet, sheet_csv_url
+from .utils import is_last_page
+
+# %%
+@validate_arguments(config=dict(arbitrary_types_allowed=True))
+def migrate_variables_from_googlesheet(
+    python_client: PythonClient, 
+    spreadsheet_url: str, 
+    gid_number: str, 
+    variables_schema: Union[VariablesSchema, dict] = DEFAULT_VARIABLES_SCHEMA,
+    update: bool = False,
+    stream_results: bool = False
+) -> None:
+    """Get variables data from googlesheet
+
+    Parameters
+    ----------
+    python_client: opensilexClientToolsPython.ApiClient | ClientPool
+        The authenticated client to connect to Opensilex
+    spreadsheet_url: str
+        The url of the googlesheet to get the variables from
+    gid_number: str
+        TODO
+    variables_schema: VariablesSchema | dict = DEFAULT_VARIABLES_SCHEMA
+        Dictionnary that describes the header of the in correspondance
+        with the names in opensilex, or the same schema already compiled.
+        Format is 'opensilexname':'columnname'
+        or 'opensilexsubtype':{'opensilexname':'columnname'}
+        (see DEFAULT_VARIABLES_SCHEMA in schemas.py)
+    update: bool = False
+        Wether to update the existing variables and components that differ
+        from the sheet (see migrate_variables)
+    stream_results: bool = False
+        Wether to write the outcomes to the csv files while the import
+        runs instead of at the end (see migrate_variables)
+
+    Returns
+    -------
+    None
+    """
+
+    variables_url = sheet_csv_url(spreadsheet_url, gid_number)
+    logging.info(variables_url)
+    variables_csv = pd.read_csv(download_sheet(variables_url))
+
+    # Replace nan with None
+    variables_csv = variables_csv.where(
+        pd.notnull(variables_csv), None
+    )
+
+    return migrate_variables(
+        python_client=python_client, 
+        variables_csv=variables_csv, 
+        variables_schema=variables_schema,
+        update=update,
+        stream_results=stream_results
+    )
+
+@validate_arguments(config=dict(arbitrary_types_allowed=True))
+def migrate_variables_from_csv(
+    python_client: PythonClient, 
+    csv_path: str, 
+    variables_schema: Union[VariablesSchema, dict] = DEFAULT_VARIABLES_SCHEMA,
+    update: bool = False,
+    stream_results: bool = False
+) -> None:
+    """Get variables data from a csv
+
+    Parameters
+    ----------
+    python_client: opensilexClientToolsPython.ApiClient | ClientPool
+        The authenticated client to connect to Opensilex
+    csv_path: str
+        The path to the csv file to get the variables from
+    variables_schema: VariablesSchema | dict = DEFAULT_VARIABLES_SCHEMA
+        Dictionnary that describes the header of the in correspondance
+        with the names in opensilex, or the same schema already compiled.
+        Format is 'opensilexname':'columnname'
+        or 'opensilexsubtype':{'opensilexname':'columnname'}
+        (see DEFAULT_VARIABLES_SCHEMA in schemas.py)
+    update: bool = False
+        Wether to update the existing variables and components that differ
+        from the sheet (see migrate_variables)
+    stream_results: bool = False
+        Wether to write the outcomes to the csv files while the import
+        runs instead of at the end (see migrate_variables)
+
+    Returns
+    -------
+    None
+    """
+    variables_csv = pd.read_csv(csv_path)
+
+    if len(variables_csv.columns) <= 2:
+        variables_csv = pd.read_csv(csv_path, sep=";")
+
+    # Replace nan with None
+    variables_csv = variables_csv.where(
+        pd.notnull(variables_csv), None
+    )
+    
+    return migrate_variables(
+        python_client=python_client, 
+        variables_csv=variables_csv, 
+        variables_schema=variables_schema,
+        update=update,
+        stream_results=stream_results
+    )
+
+# TODO Create a func to exchange heys and values in a dict
+
+@validate_arguments(config=dict(arbitrary_types_allowed=True))
+def migrate_variables(
+    python_client: PythonClient, 
+    variables_csv: pd.DataFrame, 
+    variables_schema: Union[VariablesSchema, dict] = DEFAULT_VARIABLES_SCHEMA,
+    update: bool = False,
+    stream_results: bool = False,
+    plan: ImportPlan = None
+) -> None:
+    """Create variables from a pandas.DataFrame
+
+        Parameters
+        ----------
+        python_client: opensilexClientToolsPython.ApiClient | ClientPool
+            The authenticated client to connect to Opensilex
+        variables_csv: pd.DataFrame
+            A pandas DataFrame containing the data needed to create the variables
+        variables_schema: VariablesSchema | dict = DEFAULT_VARIABLES_SCHEMA
+            Dictionnary that describes the header of the in correspondance
+            with the names in opensilex, or the same schema already compiled.
+            Format is 'opensilexname':'columnname'
+            or 'opensilexsubtype':{'opensilexname':'columnname'}
+            (see DEFAULT_VARIABLES_SCHEMA in schemas.py)
+        update: bool = False
+            Wether to update the existing variables and components that 
+            differ from the DataFrame. Only the changed rows send a request 
+            and they are saved in "variables_updated.csv"
+        stream_results: bool = False
+            Wether to write the outcomes to "variables_created.csv", 
+            "already_existed.csv", "variables_updated.csv" and "failed.csv"
+            while the import runs instead of at the end
+        plan: ImportPlan = None
+            The plan made by plan_variables for this DataFrame. Its
+            snapshot is used instead of reading opensilex again and only
+            the objects it plans to create or update send requests : the
+            ones planned as skipped are reported as already existing and
+            the ones planned to fail as failed
+
+        Returns
+        -------
+        pd.DataFrame
+            The variables created
+        """
+
+    logging.info("Update mode variable is set to " + str(update) + "\n\n")
+
+    # Check that the names given in the schema exist in the DataFrame and
+    # select all the columns of the schema, relabelled with the opensilex
+    # names, at once
+    schema = VariablesSchema.compile(variables_schema)
+    with metrics.stage("variables.transform", len(variables_csv)):
+        schema_df = schema.apply(variables_csv)
+    
+    # DataFrame for the variables to create
+    variables_df = pd.DataFrame(
+        columns=[key for key in full_schema]
+    )
+
+    # Outcomes of the objects : created variables, objects that already 
+    # existed and failed objects
+    ledger = OutcomeLedger(
+        paths={
+            "created": "variables_created.csv",
+            "already": "already_existed.csv",
+            "updated": "variables_updated.csv",
+            "failed": "failed.csv"
+        },
+        columns={
+            "created": [key for key in full_schema],
+            "already": [key for key in full_schema],
+            "updated": [key for key in full_schema],
+            "failed": schema.keys()
+        },
+        stream=stream_results
+    )
+
+    if plan is not None:
+        # Reuse what was read from opensilex when planning
+        datatypes = plan.snapshot["datatypes"]
+        cache = plan.snapshot["cache"]
+    else:
+        # Fetch all datatypes for Variable creation
+        var_api_instance = opensilexClientToolsPython.VariablesApi(python_client)
+        datatypes = var_api_instance.get_datatypes()
+
+        # Existing objects are loaded once instead of searched row by row
+        cache = VariablesLookupCache(python_client)
+    datatype_index = build_datatype_index(datatypes["result"])
+
+    # Create all objects that need to be created on opensilex
+    for key in schema.keys():
+
+        # Create objects on opensilex if needed
+        if key in schema.components:
+
+            # Subset of the dataframe with the data needed to create the 
+            # objects, with the opensilex labels
+            sub_df = schema_df[key]
+
+            # Hash the rows so that identical rows are only created once
+            row_hashes = pd.util.hash_pandas_object(sub_df, index=False)
+            
+            # Uris of the created objects by row hash (False if failed)
+            unique_uris = {}
+
+            # Create the distinct objects line by line
+            for index, row in sub_df[~row_hashes.duplicated()].iterrows():
+                object_info = None
+                try:
+                    object_info = planned_outcome(plan, row, index, key, cache)
+                    if object_info is None:
+                        with metrics.stage("variables.upload", 1):
+                            object_info = create_base_variable(
+                                python_client=python_client,
+                                row=row,
+                                index=index,
+                                variable_subtype=key,
+                                cache=cache,
+                                update=update
+                            )
+                    
+                    # If failed set the row to False and save it in failed
+                    if object_info[1] == "failed":
+                        ledger.record("failed", dict(row))
+                        unique_uris[row_hashes[index]] = False
+
+                    # If already existed update the info and save it in already existed
+                    elif object_info[1] == "already":
+                        ledger.record("already", object_info[0])
+                        unique_uris[row_hashes[index]] = object_info[0].get("uri")
+
+                    elif object_info[1] == "updated":
+                        ledger.record("updated", object_info[0])
+                        unique_uris[row_hashes[index]] = object_info[0].get("uri")
+
+                    else:
+                        unique_uris[row_hashes[index]] = object_info[0].get("uri")
+                    
+                except Exception as e:
+                    logging.debug(object_info)
+                    logging.error("Exception : %s\n" % e)
+                    ledger.record("failed", dict(row))
+                    unique_uris[row_hashes[index]] = False
+            
+            # The column for the variable subtype is set to contain the uris
+            # of every row, duplicates included
+            variables_df[key] = row_hashes.map(unique_uris)
+
+        # Special case : 'datatype'
+        elif key == "datatype":
+
+            # Resolve the whole column at once
+            raw_datatypes = schema_df[(key, "")]
+            datatype_uris = resolve_datatypes(
+                raw_datatypes, datatypes["result"], datatype_index
+            )
+
+            # If no matches, set to False
+            unresolved = datatype_uris.isna()
+            if unresolved.any():
+                logging.info(
+                    """Couldn't find a datatype for : {}\n""".format(
+                        list(raw_datatypes[unresolved].unique())
+                    )
+                )
+                for value in raw_datatypes[unresolved]:
+                    ledger.record("failed", {key: value})
+            variables_df[key] = datatype_uris.where(~unresolved, False)
+
+        else:
+            variables_df[key] = schema_df[(key, "")]
+    
+    # Now that all necessary objects were created the Variables can be created
+    # TODO Should probably be a separate func
+    for index, row in variables_df.iterrows():
+        
+        # If at least one object couldn't be created
+        if (row==False).any():
+            logging.debug(
+                """This variable couldn't be created because one or more objects couldn't be created:
+{}\n""".format(dict(row))
+            )
+
+            # Save it in the failed
+            ledger.record("failed", dict(row))
+
+        else:
+            try:
+                # Replace nan with None
+                r = row.where(pd.notnull(row), None)
+
+                # Create the variable unless the plan says otherwise
+                var_info = planned_outcome(plan, r, index, "variable", cache)
+                if var_info is None:
+                    with metrics.stage("variables.upload", 1):
+                        var_info = create_base_variable(
+                            python_client=python_client,
+                            row=r,
+                            index=index,
+                            variable_subtype='variable',
+                            cache=cache,
+                            update=update
+                        )
+                
+                if var_info[1] == "failed":
+                    # Save it in the failed
+                    ledger.record("failed", dict(row))
+                
+                elif var_info[1] == "already":
+                    # Save it in the already existed
+                    ledger.record("already", var_info[0])
+
+                elif var_info[1] == "updated":
+                    # Save it with the values after the update
+                    ledger.record("updated", var_info[0])
+
+                else:
+                    # Save it with the values after variable creation
+                    ledger.record("created", {**dict(row), **var_info[0]})
+
+            except Exception as e:
+                logging.debug(dict(r))
+                logging.error("Exception : %s\n" % e)
+                ledger.record("failed", dict(row))
+    
+    # Export the outcomes to variables_created.csv, already_existed.csv, 
+    # variables_updated.csv and failed.csv
+    ledger.close()
+    logging.info("variables and components : {}".format(dict(ledger.counts)))
+
+    return ledger.frame("created")
+
+# %%
+def build_datatype_index(datatypes: list) -> dict:
+    """Index the datatypes of opensilex by all the names they can be given
+
+    Parameters
+    ----------
+    datatypes: list
+        The datatypes returned by VariablesApi.get_datatypes
+
+    Returns
+    -------
+    dict
+        The uri of each datatype by normalized full name (datatypes.decimal),
+        short name (decimal), uri and prefixed uri (xsd:decimal)
+    """
+    datatype_index = {}
+    for dt in datatypes:
+        fragment = re.split("[#/]", dt.uri)[-1]
+        for name in [
+            dt.uri, dt.name, dt.name.split(".")[-1], fragment, "xsd:" + fragment
+        ]:
+            # If a name is shared keep the first datatype, like before
+            datatype_index.setdefault(normalize_name(name), dt.uri)
+    return datatype_index
+
+def resolve_datatypes(
+    values: pd.Series, datatypes: list, datatype_index: dict = None
+) -> pd.Series:
+    """Find the uri of the datatype of every value of a column
+
+    Parameters
+    ----------
+    values: pd.Series
+        The datatypes as written in the sheet
+    datatypes: list
+        The datatypes returned by VariablesApi.get_datatypes
+    datatype_index: dict = None
+        The index built by build_datatype_index (built here if not given)
+
+    Returns
+    -------
+    pd.Series
+        The uri of each datatype, NaN where no datatype matched
+    """
+    if datatype_index is None:
+        datatype_index = build_datatype_index(datatypes)
+
+    normalized = values.map(normalize_name, na_action="ignore")
+    datatype_uris = normalized.map(datatype_index)
+
+    # Partial names are matched as before, once per distinct value
+    for value in normalized[datatype_uris.isna() & normalized.notna()].unique():
+        matches = [dt.uri for dt in datatypes if value in dt.name.lower()]
+        if matches:
+            datatype_uris[normalized == value] = matches[0]
+
+    return datatype_uris
+
+def dto_to_dict(dto) -> dict:
+    """Extract the attributes of a DTO returned by opensilex
+
+    Parameters
+    ----------
+    dto
+        An object returned by opensilexClientToolsPython
+
+    Returns
+    -------
+    dict
+        The attributes of the object without their leading underscore
+    """
+    v = vars(dto)
+    return {
+        col.replace("_", "", 1): v[col]
+        for col in v
+        if "_" in col
+    }
+
+def changed_fields(row: pd.Series, object_dict: dict) -> dict:
+    """Return the attributes of a row that differ from an existing object
+
+    Parameters
+    ----------
+    row: pd.Series
+        The attributes of the object in the sheet
+    object_dict: dict
+        The object on opensilex, as returned by dto_to_dict
+
+    Returns
+    -------
+    dict
+        The values of the row that differ. Empty cells, the uri and the 
+        attributes opensilex didn't return aren't compared, and the 
+        objects referenced by the object are compared by uri. Values are
+        compared once normalized (see comparable_value), so "1.0" and 1
+        are the same
+    """
+    changed = {}
+    for key, value in row.items():
+        if (
+            key == "uri" or key not in object_dict
+            or value is None or value is False or value != value
+        ):
+            continue
+        current = object_dict[key]
+        current = getattr(current, "uri", current)
+        if isinstance(current, dict):
+            current = current.get("uri")
+        if current is None or comparable_value(current) != comparable_value(value):
+            changed[key] = value
+    return changed
+
+def comparable_value(value):
+    """Normalize a value read from a sheet or from opensilex for comparison
+
+    Strings are stripped, and numbers or strings holding a number are
+    converted to float.
+    """
+    if isinstance(value, bool):
+        return str(value)
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = str(value).strip()
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    # "nan" is kept as a string, it would never be equal to itself
+    return number if number == number else value
+
+def normalize_name(name) -> str:
+    """Normalize a name to compare it without case or surrounding spaces"""
+    return str(name).strip().casefold()
+
+class VariablesLookupCache:
+    """Local index of the variables and their components on opensilex
+
+    The first time a subtype (entity, characteristic, method, unit or 
+    variable) is looked up, all its objects are loaded by paging through 
+    the search results. The objects can then be found by uri or by name 
+    (ignoring case) without any request, and the objects created 
+    afterwards are added to the index.
+
+    The cache can be shared by threads : the requests are sent without 
+    holding its lock and their results are published at once, and a 
+    subtype being loaded by a thread is waited for by the others.
+
+    Parameters
+    ----------
+    python_client: opensilexClientToolsPython.ApiClient | ClientPool
+        The authenticated client to connect to Opensilex
+    page_size: int = 1000
+        The number of objects fetched by each search request
+    """
+
+    def __init__(self, python_client, page_size=1000):
+        var_api = opensilexClientToolsPython.VariablesApi(python_client)
+        self.page_size = page_size
+
+        # Dictionnary of search functions to use for each object subtype
+        self.search_func = {
+            "entity": var_api.search_entities,
+            "characteristic": var_api.search_characteristics,
+            "unit": var_api.search_units,
+            "method": var_api.search_methods,
+            # The details, so variables can be compared with the sheets
+            "variable": var_api.search_variables_details
+        }
+
+        # Dictionnary of get functions to use for each object subtype
+        self.get_func = {
+            "entity": var_api.get_entity,
+            "characteristic": var_api.get_characteristic,
+            "unit": var_api.get_unit,
+            "method": var_api.get_method,
+            "variable": var_api.get_variable
+        }
+
+        # Objects of each loaded subtype by uri and by normalized name
+        self.by_uri = {}
+        self.by_name = {}
+        self.lock = threading.Lock()
+
+        # Events of the subtypes being loaded, set once they are
+        self.loading = {}
+
+        # Details of the objects already fetched by (subtype, uri)
+        self.details = {}
+
+        # Number of requests sent by the cache
+        self.requests = 0
+
+    def load(self, variable_subtype: str) -> None:
+        """Load all the objects of a subtype unless it is already loaded"""
+        with self.lock:
+            if variable_subtype in self.by_uri:
+                return
+            loading = self.loading.get(variable_subtype)
+            loader = loading is None
+            if loader:
+                loading = self.loading[variable_subtype] = threading.Event()
+
+        if not loader:
+            # Another thread is loading the subtype, load it again if it failed
+            loading.wait()
+            with self.lock:
+                loaded = variable_subtype in self.by_uri
+            if not loaded:
+                self.load(variable_subtype)
+            return
+
+        try:
+            by_uri, by_name = {}, {}
+            page = 0
+            while True:
+                res = self.search_func[variable_subtype](
+                    page=page, page_size=self.page_size
+                )
+                with self.lock:
+                    self.requests += 1
+                for result in res["result"]:
+                    self._index(by_uri, by_name, dto_to_dict(result))
+                if is_last_page(res, page, self.page_size):
+                    break
+                page += 1
+
+            with self.lock:
+                self.by_uri[variable_subtype] = by_uri
+                self.by_name[variable_subtype] = by_name
+            logging.info("{} {} objects loaded from opensilex".format(
+                len(by_uri), variable_subtype
+            ))
+        finally:
+            with self.lock:
+                del self.loading[variable_subtype]
+            loading.set()
+
+    def find_by_uri(self, variable_subtype: str, uri: str) -> dict:
+        """Return the object with that uri or None if there is none"""
+        self.load(variable_subtype)
+        with self.lock:
+            return self.by_uri[variable_subtype].get(uri)
+
+    def find_by_name(self, variable_subtype: str, name: str) -> dict:
+        """Return an object with that name (ignoring case) or None"""
+        self.load(variable_subtype)
+        with self.lock:
+            return self.by_name[variable_subtype].get(normalize_name(name))
+
+    def get_details(self, variable_subtype: str, uri: str) -> dict:
+        """Return the details of an object, only fetching them the first time
+
+        Unlike the other lookups this doesn't load the whole subtype, so it 
+        can be used to resolve the objects referenced by other objects.
+        """
+        key = (variable_subtype, uri)
+        with self.lock:
+            if key in self.details:
+                return self.details[key]
+        res = self.get_func[variable_subtype](uri=uri)
+        with self.lock:
+            self.requests += 1
+            # Keep the details fetched first if another thread fetched them
+            return self.details.setdefault(key, dto_to_dict(res["result"]))
+
+    def add(self, variable_subtype: str, object_dict: dict) -> None:
+        """Add an object to the index, for example after creating it"""
+        self.load(variable_subtype)
+        with self.lock:
+            self._index(
+                self.by_uri[variable_subtype], self.by_name[variable_subtype],
+                object_dict
+            )
+
+    def _index(self, by_uri, by_name, object_dict):
+        if object_dict.get("uri") is not None:
+            by_uri[object_dict["uri"]] = object_dict
+        if object_dict.get("name") is not None:
+            # Keep the first object found for a name, like the search did,
+            # unless it is the same object updated
+            name = normalize_name(object_dict["name"])
+            indexed = by_name.get(name)
+            if indexed is None or indexed.get("uri") == object_dict.get("uri"):
+                by_name[name] = object_dict
+
+# %%
+# Create variables or objects on opensilex
+# Not validated by pydantic as it runs for every row, the arguments are
+# those already validated by migrate_variables
+def create_base_variable(
+    python_client: PythonClient,
+    row: pd.Series,
+    index: int,
+    variable_subtype: str,
+    cache: VariablesLookupCache = None,
+    update: bool = False
+)-> Union[dict, str]:
+    """Create objects in opensilex
+
+    Parameters
+    ----------
+    python_client: opensilexClientToolsPython.ApiClient | ClientPool
+        The authenticated client to connect to Opensilex
+    row: pd.Series
+        The series containing the data to create the object on opensilex
+    variable_subtype: str
+        The subtype of the object to be created (entity, unit, etc...)
+    cache: VariablesLookupCache = None
+        If given, the existing objects are looked up in this cache instead
+        of being searched on opensilex, and the created objects are added
+        to it
+    update: bool = False
+        Wether to update the object if it already exists and differs from
+        the row (see update_base_variable)
+
+    Returns
+    -------
+    created_object: Union[dict, bool]
+        Returns a dict corresponding to the object created or found that 
+        already existed on opensilex or False if it failed
+    """
+
+    # Dictionnary of DTO functions to use for each object subtype
+    dtos = {
+        "entity": opensilexClientToolsPython.EntityCreationDTO,
+        "characteristic": opensilexClientToolsPython.CharacteristicCreationDTO,
+        "unit": opensilexClientToolsPython.UnitCreationDTO,
+        "method": opensilexClientToolsPython.MethodCreationDTO,
+        "variable": opensilexClientToolsPython.VariableCreationDTO
+    }
+
+    # Dictionnary of apis to use for each object subtype
+    apis = {
+        "entity": opensilexClientToolsPython.VariablesApi(python_client),
+        "characteristic": opensilexClientToolsPython.VariablesApi(python_client),
+        "unit": opensilexClientToolsPython.VariablesApi(python_client),
+        "method": opensilexClientToolsPython.VariablesApi(python_client),
+        "variable": opensilexClientToolsPython.VariablesApi(python_client)
+    }
+    
+    # Dictionnary of creation functions to use for each object subtype
+    creation_func = {
+        "entity": apis["entity"].create_entity,
+        "characteristic": apis["characteristic"].create_characteristic,
+        "unit": apis["unit"].create_unit,
+        "method": apis["method"].create_method,
+        "variable": apis["variable"].create_variable,
+    }
+
+    # Dictionnary of search functions to use for each object subtype
+    search_func = {
+        "entity": apis["entity"].search_entities,
+        "characteristic": apis["characteristic"].search_characteristics,
+        "unit": apis["unit"].search_units,
+        "method": apis["method"].search_methods,
+        "variable": apis["variable"].search_variables
+    }
+    
+    # Dictionnary of get functions to use for each object subtype
+    get_func = {
+        "entity": apis["entity"].get_entity,
+        "characteristic": apis["characteristic"].get_characteristic,
+        "unit": apis["unit"].get_unit,
+        "method": apis["method"].get_method,
+        "variable": apis["variable"].get_variable
+    }
+          
+    # If no name was given, custom message
+    if "name" in row.index and row["name"] == None:
+        
+        # If no uri was given, custom message
+        if ("uri" in row.index and row["uri"] == None) or "uri" not in row.index:
+            logging.debug(
+                """The object {} couldn't be created as no name was given and couldn't be found as no uri was given\n"""\
+                    .format(dict(row))
+            )
+            return(dict(row), "failed") 
+
+        # Trying to match uri
+        try:
+            if cache is not None:
+                return_dict = cache.find_by_uri(variable_subtype, row["uri"])
+                if return_dict is None:
+                    raise LookupError(row["uri"])
+            else:
+                old_object = get_func[variable_subtype](
+                    uri = row["uri"]
+                )
+                return_dict = dto_to_dict(old_object["result"])
+        except:
+            # If no name was given and the uri doesn't match any object, custom message
+            logging.debug(
+                """The object {} couldn't be created as no name was given and couldn't be found as no object with that uri exist\n"""\
+                    .format(dict(row))
+            )
+            return(dict(row), "failed")
+        logging.debug(
+            """Object {0} at row {1} wasn't created as no name was given and an object with that uri already exists.
+That object was skipped and will appear in the "already_existed.csv" file.
+The object used instead is {2}\n""".format(dict(row), index, return_dict)
+        )
+        if update:
+            return update_base_variable(
+                python_client, row, index, variable_subtype, return_dict, cache
+            )
+        # TODO add row to already_existed.csv
+        return (return_dict, "already")
+    
+    # Check if the object already exists
+    try:
+        return_dict = None
+
+        # The cache ignores case and doesn't need any request
+        if cache is not None:
+            return_dict = cache.find_by_name(variable_subtype, row["name"])
+
+        else:
+            # Escape regex for exact match
+            escaped_name = re.escape(row["name"])
+            old_object = search_func[variable_subtype](
+                name="^" + escaped_name + "$"
+            )
+
+            if len(old_object["result"]) != 0:
+
+                # Making sure to have a consistent output
+                old_object = get_func[variable_subtype](
+                    uri = old_object["result"][0].uri
+                )
+                return_dict = dto_to_dict(old_object["result"])
+
+        # An object with the same uri would make the creation fail
+        if (
+            return_dict is None and cache is not None
+            and row.get("uri") is not None
+        ):
+            return_dict = cache.find_by_uri(variable_subtype, row["uri"])
+
+        if return_dict is not None:
+            logging.debug(
+                """Object {0} at row {1} wasn't created as an object with that name already exists.
+That object was skipped and will appear in the "already_existed.csv" file.
+The object used instead is {2}\n""".format(dict(row), index, return_dict)
+            )
+            if update:
+                return update_base_variable(
+                    python_client, row, index, variable_subtype, return_dict, cache
+                )
+            # TODO add row to already_existed.csv
+            return (return_dict, "already")
+
+    except Exception as e:
+        logging.error("""Exception on object {0} :
+    {1}
+    
+    """.format(dict(row), e))
+        # TODO add row to failed.csv
+        return (dict(row), "failed")
+    
+    # Try to use DTO function
+    try:
+        new_dto = dtos[variable_subtype](**row)
+
+        # Try to use creation function
+        try:
+            new_object = creation_func[variable_subtype](body=new_dto)
+            new_object = get_func[variable_subtype](
+                uri = new_object["result"][0]
+            )
+            return_dict = dto_to_dict(new_object["result"])
+            if cache is not None:
+                cache.add(variable_subtype, return_dict)
+            logging.debug("Object created: {}\n".format(return_dict))
+            # TODO add row to created.csv
+            return (return_dict, "created")
+
+        except Exception as e:
+            # Catch 'URI already exists' exception separately
+            if("URI already exists" in str(e)):
+                old_object = get_func[variable_subtype](
+                    uri = row['uri']
+                )
+                return_dict = dto_to_dict(old_object["result"])
+                if cache is not None:
+                    cache.add(variable_subtype, return_dict)
+                logging.debug(
+                    """Object {0} at row {1} couldn't be created as this URI already exists.
+That object was skipped and will appear in the "skipped.csv" file.
+The object with that URI will be used instead : {2}
+For the exact error see the following:
+ValueError: {3}\n""".format(dict(row), index, return_dict, e)
+                )
+                if update:
+                    return update_base_variable(
+                        python_client, row, index, variable_subtype,
+                        return_dict, cache
+                    )
+                # TODO add row to already_existed.csv
+                return (return_dict, "already")
+            else:
+                logging.error("""Exception on object{0} :
+    {1}
+    
+    """.format(dict(row), e))
+                # TODO add row to failed.csv
+                return (dict(row), "failed")
+
+    except Exception as e:
+        logging.error("""Exception on object{0} :
+    {1}
+
+""".format(dict(row), e))
+        # TODO add row to failed.csv
+        return (dict(row), "failed")
+
+def update_base_variable(
+    python_client: PythonClient,
+    row: pd.Series,
+    index: int,
+    variable_subtype: str,
+    object_dict: dict,
+    cache: VariablesLookupCache = None
+) -> Union[dict, str]:
+    """Update an existing object in opensilex if the row differs from it
+
+    Only the rows with changed attributes (see changed_fields) send a 
+    request. The object is sent with its current attributes and the 
+    changed ones, so the attributes left empty in the row are kept.
+
+    Parameters
+    ----------
+    python_client: opensilexClientToolsPython.ApiClient | ClientPool
+        The authenticated client to connect to Opensilex
+    row: pd.Series
+        The series containing the data of the object in the sheet
+    variable_subtype: str
+        The subtype of the object (entity, unit, etc...)
+    object_dict: dict
+        The existing object on opensilex, as returned by dto_to_dict
+    cache: VariablesLookupCache = None
+        If given, the updated object replaces the existing one in it
+
+    Returns
+    -------
+    tuple
+        The object after the update and "updated", the existing object and
+        "already" if nothing changed, or the row and "failed"
+    """
+    changed = changed_fields(row, object_dict)
+    if not changed:
+        return (object_dict, "already")
+
+    # Dictionnary of DTO functions to use for each object subtype
+    dtos = {
+        "entity": opensilexClientToolsPython.EntityUpdateDTO,
+        "characteristic": opensilexClientToolsPython.CharacteristicUpdateDTO,
+        "unit": opensilexClientToolsPython.UnitUpdateDTO,
+        "method": opensilexClientToolsPython.MethodUpdateDTO,
+        "variable": opensilexClientToolsPython.VariableUpdateDTO
+    }
+
+    var_api = opensilexClientToolsPython.VariablesApi(python_client)
+
+    # Dictionnary of update functions to use for each object subtype
+    update_func = {
+        "entity": var_api.update_entity,
+        "characteristic": var_api.update_characteristic,
+        "unit": var_api.update_unit,
+        "method": var_api.update_method,
+        "variable": var_api.update_variable
+    }
+
+    # Current attributes, the referenced objects by uri, and the changes
+    body = {}
+    for key in row.index:
+        if key in object_dict:
+            value = object_dict[key]
+            value = getattr(value, "uri", value)
+            body[key] = value.get("uri") if isinstance(value, dict) else value
+    body.update(changed)
+    body["uri"] = object_dict["uri"]
+
+    try:
+        update_func[variable_subtype](body=dtos[variable_subtype](**body))
+    except Exception as e:
+        logging.error("""Exception on object{0} :
+    {1}
+
+""".format(dict(row), e))
+        return (dict(row), "failed")
+
+    return_dict = {**object_dict, **body}
+    if cache is not None:
+        cache.add(variable_subtype, return_dict)
+    logging.debug("Object {0} at row {1} updated : {2}\n".format(
+        object_dict["uri"], index, changed
+    ))
+    return (return_dict, "updated")
+
+# %%
+# Plan the creation of variables before sending anything
+@validate_arguments(config=dict(arbitrary_types_allowed=True))
+def plan_variables(
+    python_client: PythonClient, 
+    variables_csv: pd.DataFrame, 
+    variables_schema: Union[VariablesSchema, dict] = DEFAULT_VARIABLES_SCHEMA,
+    update: bool = False
+) -> ImportPlan:
+    """Plan the creation of variables without creating anything
+
+    All the existing variables and components are read at once and the 
+    DataFrame is compared to them, like migrate_variables would do row by 
+    row, so the plan can be reviewed as a dry run and then given to 
+    migrate_variables.
+
+    Parameters
+    ----------
+    python_client: opensilexClientToolsPython.ApiClient | ClientPool
+        The authenticated client to connect to Opensilex
+    variables_csv: pd.DataFrame
+        A pandas DataFrame containing the data needed to create the variables
+    variables_schema: VariablesSchema | dict = DEFAULT_VARIABLES_SCHEMA
+        Dictionnary that describes the header of the in correspondance
+        with the names in opensilex, or the same schema already compiled.
+        (see DEFAULT_VARIABLES_SCHEMA in schemas.py)
+    update: bool = False
+        Wether migrate_variables will be run in update mode
+
+    Returns
+    -------
+    ImportPlan
+        One action per distinct component and per variable : "create"
+        (a creation and a get), "update" (one request) if it exists but 
+        differs from the row in update mode, "skip" if it already exists 
+        or "fail"
+    """
+    schema = VariablesSchema.compile(variables_schema)
+    schema_df = schema.apply(variables_csv)
+
+    # Snapshot of the datatypes and of every subtype of the schema
+    begin = time.perf_counter()
+    var_api_instance = opensilexClientToolsPython.VariablesApi(python_client)
+    datatypes = var_api_instance.get_datatypes()
+    cache = VariablesLookupCache(python_client)
+    for key in list(schema.components) + ["variable"]:
+        cache.load(key)
+    snapshot_seconds = time.perf_counter() - begin
+
+    # Names planned to be created, found by the following rows
+    planned = {key: set() for key in list(schema.components) + ["variable"]}
+    records = []
+
+    def plan_row(row, index, variable_subtype, action=None):
+        if action is None:
+            action = plan_base_variable(
+                row, variable_subtype, cache, planned[variable_subtype], update
+            )
+        records.append({
+            "kind": variable_subtype, "row": index, "uri": row.get("uri"),
+            "name": row.get("name"), "action": action,
+            "requests": {"create": 2, "update": 1}.get(action, 0)
+        })
+        return action
+
+    # The variables as migrate_variables sends them, with the uris of their
+    # components : False if it will fail, None if it will be created
+    variables = pd.DataFrame(
+        {key: schema_df[(key, "")] for key in schema.fields},
+        index=schema_df.index
+    ).astype(object)
+    for key in schema.components:
+        sub_df = schema_df[key]
+        row_hashes = pd.util.hash_pandas_object(sub_df, index=False)
+        uris = {}
+        for index, row in sub_df[~row_hashes.duplicated()].iterrows():
+            action = plan_row(row, index, key)
+            if action == "fail":
+                uris[row_hashes[index]] = False
+            elif action == "create":
+                uris[row_hashes[index]] = None
+            else:
+                found = plan_found_object(row, key, cache)
+                uris[row_hashes[index]] = found.get("uri")
+        variables[key] = row_hashes.map(uris)
+
+    if "datatype" in schema.fields:
+        variables["datatype"] = resolve_datatypes(
+            schema_df[("datatype", "")], datatypes["result"]
+        ).fillna(False)
+
+    for key in ["uri", "name"]:
+        if key not in variables:
+            variables[key] = None
+    variables = variables.where(pd.notnull(variables), None)
+
+    # Variables can't be created if one of their components can't, and
+    # have to be updated if one of their components is created
+    failed_rows = (variables == False).any(axis=1)
+    pending_rows = variables[list(schema.components)].isna().any(axis=1)
+    for index, row in variables.iterrows():
+        if failed_rows[index]:
+            plan_row(row, index, "variable", "fail")
+        else:
+            action = plan_base_variable(
+                row, "variable", cache, planned["variable"], update
+            )
+            if action == "skip" and update and pending_rows[index]:
+                action = "update"
+            plan_row(row, index, "variable", action)
+
+    plan = ImportPlan.from_records(
+        records,
+        snapshot={"datatypes": datatypes, "cache": cache},
+        snapshot_requests=1 + cache.requests,
+        snapshot_seconds=snapshot_seconds
+    )
+    logging.info("variables plan : {} requests".format(plan.requests))
+    return plan
+
+def plan_found_object(
+    row: pd.Series, variable_subtype: str, cache: VariablesLookupCache
+) -> dict:
+    """Return the existing object create_base_variable would use for a row,
+    looked up by name then by uri, or None"""
+    found = None
+    if row.get("name") is not None:
+        found = cache.find_by_name(variable_subtype, row["name"])
+    if found is None and row.get("uri") is not None:
+        found = cache.find_by_uri(variable_subtype, row["uri"])
+    return found
+
+def planned_outcome(
+    plan: ImportPlan, row: pd.Series, index, variable_subtype: str,
+    cache: VariablesLookupCache
+):
+    """Return the outcome of a row the plan doesn't send, like
+    create_base_variable returns it, or None if the row has to be sent
+
+    The rows planned to fail are failed, and the rows planned as skipped
+    reuse the existing object of the snapshot. A skipped object that isn't
+    found (created by an earlier row that failed) is sent anyway.
+    """
+    action = plan.action(variable_subtype, index) if plan is not None else None
+    if action == "fail":
+        return (dict(row), "failed")
+    if action == "skip":
+        found = plan_found_object(row, variable_subtype, cache)
+        if found is not None:
+            return (found, "already")
+    return None
+
+def plan_base_variable(
+    row: pd.Series, variable_subtype: str, cache: VariablesLookupCache,
+    planned: set, update: bool = False
+) -> str:
+    """Return what create_base_variable would do with a row of a plan
+
+    Parameters
+    ----------
+    row: pd.Series
+        The attributes of the object
+    variable_subtype: str
+        The subtype of the object (entity, unit, etc...)
+    cache: VariablesLookupCache
+        The snapshot of the existing objects
+    planned: set
+        The normalized names of the objects already planned to be created,
+        the names of the created objects are added to it
+    update: bool = False
+        Wether the existing objects that differ from the row are updated
+
+    Returns
+    -------
+    str
+        "create", "update", "skip" if the object already exists or "fail"
+    """
+    found = plan_found_object(row, variable_subtype, cache)
+
+    if found is None:
+        if row.get("name") is None:
+            return "fail"
+        name = normalize_name(row["name"])
+        if name in planned:
+            return "skip"
+        planned.add(name)
+        return "create"
+
+    if update and changed_fields(row, found):
+        return "update"
+    return "skip"
+
+# %%
+# Fetch variables
+@validate_arguments(config=dict(arbitrary_types_allowed=True))
+def get_variables(
+    python_client: PythonClient, 
+    csv_path: str = "variables_export.csv",
+    uri_match = None,
+    name_match = None,
+    page_size: int = 100,
+    return_df: bool = True,
+    variables_schema: Union[VariablesSchema, dict] = DEFAULT_VARIABLES_SCHEMA
+) -> None:
+    """Export the variables of opensilex to a csv
+
+        The variables are fetched page by page and each page is written to 
+        the csv as soon as it arrives.
+
+        Parameters
+        ----------
+        python_client: opensilexClientToolsPython.ApiClient | ClientPool
+            The authenticated client to connect to Opensilex
+        csv_path: str = "variables_export.csv"
+            The path of the csv file to write
+        uri_match: str = None
+            Only export the variables with this string in their uri
+        name_match: str = None
+            Or with this string in their name
+        page_size: int = 100
+            The number of variables fetched by each request
+        return_df: bool = True
+            Wether to also return the variables as a DataFrame. Set it to 
+            False to keep memory bounded on large instances
+        variables_schema: VariablesSchema | dict = DEFAULT_VARIABLES_SCHEMA
+            Dictionnary that describes the header of the csv in correspondance
+            with the names in opensilex, or the same schema already compiled.
+            Format is 'opensilexname':'columnname'
+            or 'opensilexsubtype':{'opensilexname':'columnname'}
+            (see DEFAULT_VARIABLES_SCHEMA in schemas.py)
+
+        Returns
+        -------
+        pd.DataFrame
+            The exported variables, or None if return_df is False
+        """
+
+    # Entities, characteristics, methods and units are shared by many
+    # variables so each of them is only fetched once
+    cache = VariablesLookupCache(python_client)
+
+    schema = VariablesSchema.compile(variables_schema)
+
+    # Write the header, then the rows of each page as soon as it arrives
+    ledger = OutcomeLedger(
+        paths={"exported": csv_path},
+        columns={"exported": list(dict.fromkeys(schema.columns))},
+        stream=True,
+        keep_in_memory=return_df
+    )
+
+    for page in iter_variables_details(python_client, page_size=page_size):
+
+        for res in page:
+            
+            if(
+                (uri_match and uri_match in res.uri)
+                or (name_match and name_match in res.name)
+                or (not uri_match and not name_match)
+            ):
+
+                # Extract the attributes of the resultDTO object
+                var_dict = dto_to_dict(res)
+                
+                # Dictionary to extract the data from one result
+                res_dict = {}
+                
+                for key, column in schema.fields.items():
+                    res_dict[column] = var_dict[key]
+
+                for key, sub_schema in schema.components.items():
+
+                    # In case Method/Unit/Characteristic/Entity is None
+                    # (Shouldn't be possible but still happens)
+                    if var_dict[key] != None:
+                        sub_dict = cache.get_details(key, var_dict[key].uri)
+                        for key_2 in sub_schema.keys():
+                            res_dict[sub_schema[key_2]] = sub_dict[key_2]
+                    
+                    else:
+                        for key_2 in sub_schema.keys():
+                            res_dict[sub_schema[key_2]] = None
+
+                ledger.record("exported", res_dict)
+
+        # Saving the page in the csv
+        ledger.flush()
+
+    if not return_df:
+        return None
+    return ledger.frame("exported")
+
+def iter_variables_details(
+    python_client: PythonClient,
+    page_size: int = 100,
+    **search_kwargs
+):
+    """Iterate over the variables of opensilex page by page
+
+    The next page is fetched in the background while the current one is 
+    being processed.
+
+    Parameters
+    ----------
+    python_client: opensilexClientToolsPython.ApiClient | ClientPool
+        The authenticated client to connect to Opensilex
+    page_size: int = 100
+        The number of variables fetched by each request
+    search_kwargs
+        Other arguments passed to VariablesApi.search_variables_details
+
+    Yields
+    ------
+    list
+        The variables of a page, as returned by search_variables_details
+    """
+    var_api = opensilexClientToolsPython.VariablesApi(python_client)
+
+    def fetch_page(page):
+        return var_api.search_variables_details(
+            page=page, page_size=page_size, **search_kwargs
+        )
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        page = 0
+        next_page = executor.submit(fetch_page, page)
+        while True:
+            res = next_page.result()
+            results = res["result"]
+            is_last = is_last_page(res, page, page_size)
+
+            # Start fetching the next page before handing this one over
+            if not is_last:
+                next_page = executor.submit(fetch_page, page + 1)
+            if results:
+                yield results
+            if is_last:
+                break
+            page += 1
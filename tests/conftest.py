@@ -0,0 +1,114 @@
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from functools import partial
+
+import pytest
+
+# The functions package is imported from the root of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeObject:
+    """An object returned by the api, its attributes prefixed by _ like the DTOs"""
+
+    def __init__(self, **attributes):
+        for key, value in attributes.items():
+            setattr(self, "_" + key, value)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self.__dict__.get("_" + name)
+
+
+class FakeVariablesApi:
+    """In memory VariablesApi counting the calls of each method"""
+
+    subtypes = {
+        "entity": "entities",
+        "characteristic": "characteristics",
+        "method": "methods",
+        "unit": "units",
+        "variable": "variables",
+    }
+
+    datatypes = [
+        FakeObject(uri="http://www.w3.org/2001/XMLSchema#decimal", name="datatypes.decimal"),
+        FakeObject(uri="http://www.w3.org/2001/XMLSchema#string", name="datatypes.string"),
+        FakeObject(uri="http://www.w3.org/2001/XMLSchema#date", name="datatypes.date"),
+    ]
+
+    def __init__(self):
+        self.objects = {subtype: {} for subtype in self.subtypes}
+        self.calls = Counter()
+        self.lock = threading.Lock()
+        for subtype, plural in self.subtypes.items():
+            setattr(self, "search_" + plural, partial(self.search, subtype))
+            setattr(self, "get_" + subtype, partial(self.get, subtype))
+            setattr(self, "create_" + subtype, partial(self.create, subtype))
+            setattr(self, "update_" + subtype, partial(self.update, subtype))
+        self.search_variables_details = partial(self.search, "variable")
+
+    def count(self, call):
+        with self.lock:
+            self.calls[call] += 1
+
+    def add(self, subtype, **attributes):
+        self.objects[subtype][attributes["uri"]] = FakeObject(**attributes)
+
+    def search(self, subtype, name=None, page=0, page_size=20, **kwargs):
+        self.count("search_" + self.subtypes[subtype])
+        found = [
+            o for o in self.objects[subtype].values()
+            if name is None or re.search(name, o.name)
+        ]
+        return {
+            "result": found[page * page_size:(page + 1) * page_size],
+            "metadata": {"pagination": {"totalCount": len(found)}},
+        }
+
+    def get(self, subtype, uri):
+        self.count("get_" + subtype)
+        if uri not in self.objects[subtype]:
+            raise Exception("(404) Reason: not found")
+        return {"result": self.objects[subtype][uri]}
+
+    def create(self, subtype, body):
+        self.count("create_" + subtype)
+        attributes = body_attributes(body)
+        uri = attributes.get("uri") or "gen:{}/{}".format(subtype, attributes["name"])
+        if uri in self.objects[subtype]:
+            raise Exception("(409) Reason: URI already exists")
+        attributes["uri"] = uri
+        self.add(subtype, **attributes)
+        return {"result": [uri]}
+
+    def update(self, subtype, body):
+        self.count("update_" + subtype)
+        attributes = body_attributes(body)
+        self.add(subtype, **attributes)
+        return {"result": [attributes["uri"]]}
+
+    def get_datatypes(self):
+        self.count("get_datatypes")
+        return {"result": list(self.datatypes)}
+
+
+def body_attributes(body):
+    """The attributes of a DTO sent to the api"""
+    return {
+        key.lstrip("_"): value for key, value in vars(body).items()
+        if key.startswith("_")
+    }
+
+
+@pytest.fixture
+def variables_api(monkeypatch):
+    """A FakeVariablesApi used by the functions instead of VariablesApi"""
+    client_module = pytest.importorskip("opensilexClientToolsPython")
+    api = FakeVariablesApi()
+    monkeypatch.setattr(client_module, "VariablesApi", lambda python_client: api)
+    return api
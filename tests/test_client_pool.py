@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+
+opensilexClientToolsPython = pytest.importorskip("opensilexClientToolsPython")
+
+from functions.clients import ClientPool
+
+
+def authenticated_client():
+    client = opensilexClientToolsPython.ApiClient()
+    client.set_default_header("Authorization", "Bearer token")
+    return client
+
+
+def test_clients_share_the_headers():
+    pool = ClientPool(authenticated_client(), size=3, keep_alive=False)
+    assert len(pool.clients) == 3
+    for client in pool.clients:
+        assert client.default_headers["Authorization"] == "Bearer token"
+        assert client.default_headers["Connection"] == "close"
+
+
+def test_size_must_be_positive():
+    with pytest.raises(ValueError):
+        ClientPool(authenticated_client(), size=0)
+
+
+def test_acquire_waits_for_a_released_client():
+    pool = ClientPool(authenticated_client(), size=2)
+    acquired = []
+    with pool.acquire() as first, pool.acquire() as second:
+        assert first is not second
+
+        def third():
+            with pool.acquire() as client:
+                acquired.append(client)
+
+        thread = threading.Thread(target=third)
+        thread.start()
+        thread.join(0.2)
+        # Both clients are lent, the third caller waits
+        assert acquired == []
+    thread.join(5)
+    assert acquired[0] in (first, second)
+
+
+def test_requests_are_bounded_by_the_size(monkeypatch):
+    pool = ClientPool(authenticated_client(), size=2, timeout=7)
+    lock = threading.Lock()
+    state = {"running": 0, "max_running": 0, "timeouts": set()}
+
+    def call_api(*args, **kwargs):
+        with lock:
+            state["running"] += 1
+            state["max_running"] = max(state["max_running"], state["running"])
+            state["timeouts"].add(kwargs["_request_timeout"])
+        time.sleep(0.02)
+        with lock:
+            state["running"] -= 1
+        return {"result": []}
+
+    for client in pool.clients:
+        monkeypatch.setattr(client, "call_api", call_api)
+    threads = [threading.Thread(target=pool.call_api, args=("/path", "GET")) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert state["max_running"] == 2
+    assert state["timeouts"] == {7}
@@ -0,0 +1,154 @@
+import pandas as pd
+import pytest
+
+opensilexClientToolsPython = pytest.importorskip("opensilexClientToolsPython")
+
+from functions.data import add_data_from, data_reject_columns, send_data_batch
+from functions.journal import ImportJournal
+from functions.ledger import OutcomeLedger
+
+
+class ApiError(Exception):
+    def __init__(self, status):
+        super().__init__("HTTP {}".format(status))
+        self.status = status
+
+
+class ScriptedDataApi:
+    """DataApi answering each add_list_data call with the next status"""
+
+    def __init__(self, statuses=()):
+        self.statuses = list(statuses)
+        self.sent = []
+
+    def add_list_data(self, body):
+        status = self.statuses.pop(0) if self.statuses else None
+        if status is not None:
+            raise ApiError(status)
+        self.sent.extend(data.value for data in body)
+
+
+def data_batch(rows):
+    return pd.DataFrame({
+        "date": ["2021-06-0{}".format(i % 9 + 1) for i in range(rows)],
+        "objectURI": ["os:{}".format(i) for i in range(rows)],
+        "variable_uri": "var:1",
+        "value": [float(i) for i in range(rows)],
+        "provenanceURI": "prov:1",
+        "experimentURI": "expe:1",
+    })
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = ImportJournal(str(tmp_path / "journal.sqlite"))
+    yield journal
+    journal.close()
+
+
+@pytest.fixture
+def rejects(tmp_path):
+    rejects = OutcomeLedger(
+        paths={"rejected": str(tmp_path / "rejected.csv")},
+        columns={"rejected": data_reject_columns},
+        stream=True,
+        keep_in_memory=False
+    )
+    yield rejects
+    rejects.close()
+
+
+def test_server_error_after_a_sent_half_only_retries_the_unsent_rows(
+    journal, rejects
+):
+    batch = data_batch(8)
+    # The batch is rejected, its first half is sent, then the server fails
+    data_api = ScriptedDataApi([400, None, 503])
+    report = send_data_batch(
+        data_api, 0, 10, batch, journal=journal, source="data", rejects=rejects
+    )
+    assert report["status"] == "partial"
+    assert report["unsent"] == 4
+    assert data_api.sent == [0.0, 1.0, 2.0, 3.0]
+    assert not journal.is_done("data", 10, 17)
+    assert journal.done_rows("data", 10, 17) == {10, 11, 12, 13}
+
+    # Resuming only sends the rows that didn't land
+    data_api = ScriptedDataApi()
+    report = send_data_batch(
+        data_api, 0, 10, batch, journal=journal, source="data", rejects=rejects
+    )
+    assert report["status"] == "sent"
+    assert report["rows"] == 4
+    assert data_api.sent == [4.0, 5.0, 6.0, 7.0]
+    assert journal.is_done("data", 10, 17)
+
+
+def test_rows_rejected_before_an_error_are_not_retried(journal, rejects):
+    batch = data_batch(4)
+    # Row 0 is rejected and row 1 sent before the server fails on rows 2-3
+    data_api = ScriptedDataApi([400, 400, 400, None, 503])
+    report = send_data_batch(
+        data_api, 0, 0, batch, journal=journal, source="data", rejects=rejects
+    )
+    assert (report["status"], report["rejected"], report["unsent"]) == ("partial", 1, 2)
+    assert journal.done_rows("data", 0, 3) == {0, 1}
+
+    data_api = ScriptedDataApi()
+    send_data_batch(
+        data_api, 0, 0, batch, journal=journal, source="data", rejects=rejects
+    )
+    assert data_api.sent == [2.0, 3.0]
+
+
+def test_server_error_before_any_half_fails_the_whole_batch(journal, rejects):
+    report = send_data_batch(
+        ScriptedDataApi([503]), 0, 0, data_batch(4), journal=journal,
+        source="data", rejects=rejects
+    )
+    assert report["status"] == "failed"
+    assert journal.done_rows("data", 0, 3) == set()
+
+
+class RejectingDataApi(ScriptedDataApi):
+    """DataApi rejecting the batches holding some values"""
+
+    def __init__(self, rejected_values):
+        super().__init__()
+        self.rejected_values = set(rejected_values)
+
+    def add_list_data(self, body):
+        if any(data.value in self.rejected_values for data in body):
+            raise ApiError(400)
+        self.sent.extend(data.value for data in body)
+
+
+def test_resumed_import_keeps_the_rows_rejected_before(tmp_path, monkeypatch):
+    data_api = RejectingDataApi({2.0, 9.0})
+    monkeypatch.setattr(
+        opensilexClientToolsPython, "DataApi", lambda python_client: data_api
+    )
+    reject_path = str(tmp_path / "rejected.csv")
+    data = data_batch(10)
+
+    def run():
+        journal = ImportJournal(str(tmp_path / "journal.sqlite"))
+        try:
+            return add_data_from(
+                opensilexClientToolsPython.ApiClient(), data, batch_size=5,
+                journal=journal, source="data", bisect_failures=True,
+                reject_path=reject_path
+            )
+        finally:
+            journal.close()
+
+    report = run()
+    assert report["status"].tolist() == ["partial", "partial"]
+    assert pd.read_csv(reject_path)["row"].tolist() == [2, 9]
+
+    # The second run skips every batch and keeps the rejected rows
+    data_api.sent = []
+    report = run()
+    assert report["status"].tolist() == ["skipped", "skipped"]
+    assert data_api.sent == []
+    assert pd.read_csv(reject_path)["row"].tolist() == [2, 9]
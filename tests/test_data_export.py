@@ -0,0 +1,101 @@
+import pandas as pd
+import pytest
+
+opensilexClientToolsPython = pytest.importorskip("opensilexClientToolsPython")
+
+import functions.data
+from functions.data import data_export_columns, data_page_frame, export_data
+
+
+def data_get_dto(json):
+    """Deserialize an observation as returned by opensilex"""
+    client = opensilexClientToolsPython.ApiClient()
+    return client._ApiClient__deserialize(json, "DataGetDTO")
+
+
+def observation(value, target="os:1"):
+    return data_get_dto({
+        "uri": "data:{}".format(value),
+        "date": "2021-06-01T10:00:00+02:00",
+        "target": target,
+        "variable": "var:1",
+        "value": value,
+        "provenance": {"uri": "prov:1", "experiments": ["expe:1"]},
+    })
+
+
+def test_page_frame_maps_the_data_get_dto():
+    frame = data_page_frame([observation(1.5), observation(2.5, "os:2")])
+    assert list(frame.columns) == data_export_columns
+    assert frame.to_dict("records")[1] == {
+        "variableURI": "var:1",
+        "variable": None,
+        "date": "2021-06-01T10:00:00+02:00",
+        "value": 2.5,
+        "objectURI": "os:2",
+        "provenanceURI": "prov:1",
+        "experimentURI": "expe:1",
+    }
+
+
+def failing_pages(*args, **kwargs):
+    yield [observation(1.0), observation(2.0)]
+    raise ConnectionError("page 2 lost")
+
+
+def test_csv_export(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        functions.data, "iter_data_pages",
+        lambda *args, **kwargs: iter([[observation(1.0)], [observation(2.0)]])
+    )
+    path = str(tmp_path / "data.csv")
+    rows = export_data(
+        opensilexClientToolsPython.ApiClient(), path, variable_names=False
+    )
+    assert rows == 2
+    exported = pd.read_csv(path)
+    assert list(exported.columns) == data_export_columns
+    assert exported["value"].tolist() == [1.0, 2.0]
+
+
+def test_parquet_export_is_closed_when_a_page_fails(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow", exc_type=ImportError)
+    import pyarrow.parquet as pq
+    monkeypatch.setattr(functions.data, "iter_data_pages", failing_pages)
+    path = str(tmp_path / "data.parquet")
+    with pytest.raises(ConnectionError):
+        export_data(opensilexClientToolsPython.ApiClient(), path, variable_names=False)
+    # The pages written before the error can be read
+    assert pq.read_table(path).column("value").to_pylist() == [1.0, 2.0]
+
+
+def mixed_pages(*args, **kwargs):
+    yield [observation(1.5), observation(2.0)]
+    yield [observation("n/a")]
+    yield [observation(3.0)]
+
+
+@pytest.mark.parametrize("name", ["data.parquet", "data.arrow"])
+def test_later_values_that_arent_numbers_widen_the_export(tmp_path, monkeypatch, name):
+    pa = pytest.importorskip("pyarrow", exc_type=ImportError)
+    import pyarrow.parquet as pq
+    from pyarrow import feather
+    monkeypatch.setattr(functions.data, "iter_data_pages", mixed_pages)
+    path = str(tmp_path / name)
+    rows = export_data(opensilexClientToolsPython.ApiClient(), path, variable_names=False)
+    assert rows == 4
+    table = pq.read_table(path) if name.endswith(".parquet") else feather.read_table(path)
+    assert table.schema.field("value").type == pa.string()
+    assert table.column("value").to_pylist() == ["1.5", "2.0", "n/a", "3.0"]
+    assert table.column("objectURI").to_pylist() == ["os:1"] * 4
+    assert sorted(p.name for p in tmp_path.iterdir()) == [name]
+
+
+def test_double_export_rejects_values_that_arent_numbers(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow", exc_type=ImportError)
+    monkeypatch.setattr(functions.data, "iter_data_pages", mixed_pages)
+    with pytest.raises(ValueError, match="value_type"):
+        export_data(
+            opensilexClientToolsPython.ApiClient(), str(tmp_path / "data.parquet"),
+            variable_names=False, value_type="double"
+        )
@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("opensilexClientToolsPython")
+
+from conftest import FakeVariablesApi
+from functions.variables import build_datatype_index, normalize_name, resolve_datatypes
+
+datatypes = FakeVariablesApi.datatypes
+decimal = "http://www.w3.org/2001/XMLSchema#decimal"
+string = "http://www.w3.org/2001/XMLSchema#string"
+
+
+def test_index_names():
+    index = build_datatype_index(datatypes)
+    for name in ["datatypes.decimal", "decimal", decimal, "xsd:decimal"]:
+        assert index[normalize_name(name)] == decimal
+
+
+@pytest.mark.parametrize("value", [
+    "decimal", " Decimal ", "datatypes.decimal", "DATATYPES.DECIMAL", decimal, "xsd:decimal"
+])
+def test_match_by_label_or_uri(value):
+    assert resolve_datatypes(pd.Series([value]), datatypes).tolist() == [decimal]
+
+
+def test_partial_names_are_matched():
+    assert resolve_datatypes(pd.Series(["strin"]), datatypes).tolist() == [string]
+
+
+def test_unknown_and_missing_datatypes_are_nan():
+    resolved = resolve_datatypes(
+        pd.Series(["integer", None, "decimal", "integer"]), datatypes
+    )
+    assert resolved.isna().tolist() == [True, True, False, True]
+    assert resolved[2] == decimal
+
+
+def test_given_index_is_used():
+    index = build_datatype_index(datatypes)
+    index["number"] = decimal
+    assert resolve_datatypes(pd.Series(["Number"]), datatypes, index).tolist() == [decimal]
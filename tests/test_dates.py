@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("opensilexClientToolsPython")
+pytest.importorskip("dateparser")
+
+from functions.data import build_data_list, normalize_dates, transformDate
+
+
+parsed_dates = [
+    "2017-06-27T23:51:00+02:00",
+    "2017-06-27T23:51:00Z",
+    "2017-06-27 23:51",
+    "2017-06-27",
+    "27 June 2017 23:51",
+    "June 28, 2017",
+]
+
+
+def test_normalize_dates_matches_transform_date():
+    dates = pd.Series(parsed_dates + parsed_dates[::-1])
+    assert normalize_dates(dates).tolist() == [transformDate(d) for d in dates]
+
+
+def test_missing_dates_are_none():
+    dates = pd.Series([parsed_dates[0], None, np.nan, parsed_dates[4], pd.NaT], dtype=object)
+    normalized = normalize_dates(dates)
+    assert normalized.tolist() == [
+        transformDate(parsed_dates[0]), None, None, transformDate(parsed_dates[4]), None
+    ]
+
+
+def test_unparsable_dates_are_none():
+    assert normalize_dates(pd.Series(["not a date at all"])).tolist() == [None]
+
+
+def test_missing_date_is_rejected():
+    batch = pd.DataFrame({
+        "date": [None], "objectURI": ["os:1"], "variable_uri": ["var:1"],
+        "value": [1.0], "provenanceURI": ["prov:1"], "experimentURI": ["expe:1"],
+    })
+    with pytest.raises(ValueError):
+        build_data_list(batch)
@@ -0,0 +1,125 @@
+import pandas as pd
+import pytest
+
+from functions.files import iter_table_chunks, table_format
+
+
+@pytest.mark.parametrize("path, file_format", [
+    ("data.csv", "csv"),
+    ("data.txt", "csv"),
+    ("data.parquet", "parquet"),
+    ("data.PQ", "parquet"),
+    ("data.arrow", "arrow"),
+    ("data.feather", "arrow"),
+    ("data.arrows.zst", "arrow"),
+    ("data.ipc.gz", "arrow"),
+])
+def test_table_format(path, file_format):
+    assert table_format(path) == file_format
+
+
+def test_compressed_parquet_is_rejected():
+    with pytest.raises(ValueError, match="Parquet"):
+        table_format("data.parquet.gz")
+
+
+def frame(rows=25):
+    return pd.DataFrame({
+        "value": [float(i) for i in range(rows)],
+        "objectURI": ["os:{}".format(i) for i in range(rows)],
+    })
+
+
+def test_csv_chunks(tmp_path):
+    path = str(tmp_path / "data.csv")
+    frame().to_csv(path, index=False)
+    chunks = list(iter_table_chunks(path, batch_size=10))
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert list(chunks[2].index) == list(range(20, 25))
+
+
+def test_csv_chunks_select_columns(tmp_path):
+    path = str(tmp_path / "data.csv")
+    frame().to_csv(path, index=False)
+    chunks = list(iter_table_chunks(path, batch_size=10, columns=["value", "other"]))
+    assert all(list(chunk.columns) == ["value"] for chunk in chunks)
+    assert pd.concat(chunks)["value"].tolist() == frame()["value"].tolist()
+
+
+@pytest.fixture
+def pa():
+    return pytest.importorskip("pyarrow", exc_type=ImportError)
+
+
+def test_parquet_chunks_keep_positions_and_select_columns(tmp_path, pa):
+    import pyarrow.parquet as pq
+    path = str(tmp_path / "data.parquet")
+    pq.write_table(pa.Table.from_pandas(frame()), path, row_group_size=7)
+    chunks = list(iter_table_chunks(path, batch_size=10, columns=["value", "other"]))
+    data = pd.concat(chunks)
+    assert list(data.columns) == ["value"]
+    assert list(data.index) == list(range(25))
+    assert data["value"].tolist() == frame()["value"].tolist()
+
+
+@pytest.mark.parametrize("memory_map", [True, False])
+def test_arrow_file_chunks(tmp_path, pa, memory_map):
+    from pyarrow import ipc
+    path = str(tmp_path / "data.arrow")
+    with ipc.new_file(path, pa.Schema.from_pandas(frame(), preserve_index=False)) as writer:
+        writer.write_table(pa.Table.from_pandas(frame(), preserve_index=False), max_chunksize=12)
+    chunks = list(iter_table_chunks(path, batch_size=10, memory_map=memory_map))
+    assert [len(chunk) for chunk in chunks] == [10, 2, 10, 2, 1]
+    assert pd.concat(chunks)["objectURI"].tolist() == frame()["objectURI"].tolist()
+
+
+@pytest.mark.parametrize("name, memory_map", [
+    ("data.parquet", True), ("data.parquet", False),
+    ("data.arrow", True), ("data.arrow", False),
+])
+def test_files_are_closed(tmp_path, pa, monkeypatch, name, memory_map):
+    import pyarrow.parquet as pq
+    path = str(tmp_path / name)
+    table = pa.Table.from_pandas(frame(), preserve_index=False)
+    if name.endswith(".parquet"):
+        pq.write_table(table, path, row_group_size=7)
+    else:
+        from pyarrow import feather
+        feather.write_feather(table, path, chunksize=7)
+
+    opened = []
+    for open_name in ["memory_map", "OSFile"]:
+        def recording_open(*args, open_file=getattr(pa, open_name), **kwargs):
+            source = open_file(*args, **kwargs)
+            opened.append(source)
+            return source
+        monkeypatch.setattr(pa, open_name, recording_open)
+
+    list(iter_table_chunks(path, batch_size=10, memory_map=memory_map))
+    chunks = iter_table_chunks(path, batch_size=10, memory_map=memory_map)
+    next(chunks)
+    chunks.close()
+    assert len(opened) == 2
+    assert all(source.closed for source in opened)
+
+
+def test_compressed_arrow_stream_is_read(tmp_path, pa):
+    from pyarrow import ipc
+    path = str(tmp_path / "data.arrows.gz")
+    table = pa.Table.from_pandas(frame(), preserve_index=False)
+    with pa.output_stream(path, compression="gzip") as sink:
+        with ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    data = pd.concat(iter_table_chunks(path, batch_size=10))
+    assert data["value"].tolist() == frame()["value"].tolist()
+
+
+def test_compressed_arrow_file_is_rejected(tmp_path, pa):
+    from pyarrow import ipc
+    path = str(tmp_path / "data.arrow.gz")
+    table = pa.Table.from_pandas(frame(), preserve_index=False)
+    with pa.output_stream(path, compression="gzip") as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    with pytest.raises(ValueError, match="Arrow streams"):
+        list(iter_table_chunks(path))
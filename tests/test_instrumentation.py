@@ -0,0 +1,99 @@
+import threading
+
+import pytest
+
+pytest.importorskip("opensilexClientToolsPython")
+
+from functions.instrumentation import MetricsRegistry
+
+
+def test_calls_are_aggregated_by_method():
+    registry = MetricsRegistry()
+    registry.record_call("add_list_data", 0.02, request_bytes=100, response_bytes=10)
+    registry.record_call("add_list_data", 0.2, request_bytes=50, error=True)
+    registry.record_call("search_variables", 3)
+
+    calls = registry.summary()["api"]
+
+    assert set(calls) == {"add_list_data", "search_variables"}
+    call = calls["add_list_data"]
+    assert call["count"] == 2
+    assert call["errors"] == 1
+    assert abs(call["seconds"] - 0.22) < 1e-9
+    assert call["max_seconds"] == 0.2
+    assert abs(call["mean_seconds"] - 0.11) < 1e-9
+    assert call["request_bytes"] == 150
+    assert call["response_bytes"] == 10
+    assert call["buckets"]["0.025"] == 1
+    assert call["buckets"]["0.25"] == 1
+    assert sum(call["buckets"].values()) == 2
+    assert call["p50_seconds"] == 0.025
+    assert call["p99_seconds"] == 0.25
+    assert calls["search_variables"]["buckets"]["5"] == 1
+
+def test_stages_are_timed_and_aggregated():
+    registry = MetricsRegistry()
+    registry.record_stage("data.read", 2.0, rows=100)
+    with registry.stage("data.read", rows=50):
+        pass
+    try:
+        with registry.stage("data.upload"):
+            raise RuntimeError("timed anyway")
+    except RuntimeError:
+        pass
+
+    stages = registry.summary()["stages"]
+
+    assert stages["data.read"]["count"] == 2
+    assert stages["data.read"]["rows"] == 150
+    assert stages["data.read"]["seconds"] >= 2.0
+    assert stages["data.read"]["rows_per_s"] > 0
+    assert stages["data.upload"]["count"] == 1
+    assert "rows_per_s" not in stages["data.upload"]
+
+def test_reset_forgets_everything():
+    registry = MetricsRegistry()
+    registry.record_call("add_list_data", 0.1)
+    registry.record_stage("data.read", 0.1)
+    registry.reset()
+
+    summary = registry.summary()
+
+    assert summary["api"] == {}
+    assert summary["stages"] == {}
+
+def test_concurrent_updates_are_all_counted():
+    registry = MetricsRegistry()
+    threads_count, updates = 8, 500
+    barrier = threading.Barrier(threads_count)
+
+    def update(i):
+        barrier.wait()
+        for _ in range(updates):
+            registry.record_call("method_{}".format(i % 2), 0.001, request_bytes=1)
+            with registry.stage("stage", rows=1):
+                pass
+
+    threads = [threading.Thread(target=update, args=(i,)) for i in range(threads_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    summary = registry.summary()
+    counts = [call["count"] for call in summary["api"].values()]
+    assert counts == [threads_count // 2 * updates] * 2
+    assert sum(call["request_bytes"] for call in summary["api"].values()) == threads_count * updates
+    assert summary["stages"]["stage"]["count"] == threads_count * updates
+    assert summary["stages"]["stage"]["rows"] == threads_count * updates
+
+def test_prometheus_histogram_is_cumulative():
+    registry = MetricsRegistry()
+    registry.record_call("add_list_data", 0.02)
+    registry.record_call("add_list_data", 0.2)
+
+    text = registry.to_prometheus()
+
+    assert 'opensilex_client_request_duration_seconds_bucket{method="add_list_data",le="0.025"} 1' in text
+    assert 'opensilex_client_request_duration_seconds_bucket{method="add_list_data",le="+Inf"} 2' in text
+    assert 'opensilex_client_request_duration_seconds_count{method="add_list_data"} 2' in text
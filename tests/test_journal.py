@@ -0,0 +1,45 @@
+import pytest
+
+from functions.journal import ImportJournal
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = ImportJournal(str(tmp_path / "journal.sqlite"))
+    yield journal
+    journal.close()
+
+
+def test_done_batches_are_skipped(journal):
+    journal.record("data.csv", 0, 999, "sent")
+    journal.record("data.csv", 1000, 1999, "failed", "HTTP 503")
+    assert journal.is_done("data.csv", 0, 999)
+    assert journal.is_done("data.csv", 10, 20)
+    assert not journal.is_done("data.csv", 1000, 1999)
+    assert not journal.is_done("other.csv", 0, 999)
+
+
+def test_outcome_is_replaced(journal):
+    journal.record("data.csv", 0, 9, "failed", "HTTP 503")
+    journal.record("data.csv", 0, 9, "sent")
+    outcomes = journal.outcomes("data.csv")
+    assert outcomes[["first_row", "last_row", "status"]].values.tolist() == [[0, 9, "sent"]]
+
+
+def test_journal_persists(tmp_path):
+    path = str(tmp_path / "journal.sqlite")
+    journal = ImportJournal(path)
+    journal.record("objects", 3, 3, "created")
+    journal.close()
+    journal = ImportJournal(path)
+    assert journal.is_done("objects", 3, 3)
+    journal.close()
+
+
+def test_record_rows_groups_consecutive_rows(journal):
+    journal.record_rows("data.csv", [7, 3, 4, 5, 9], "sent")
+    outcomes = journal.outcomes("data.csv")
+    assert outcomes[["first_row", "last_row"]].values.tolist() == [[3, 5], [7, 7], [9, 9]]
+    assert journal.done_rows("data.csv", 4, 8) == {4, 5, 7}
+    assert journal.has_outcomes("data.csv")
+    assert not journal.has_outcomes("other.csv")
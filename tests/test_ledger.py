@@ -0,0 +1,48 @@
+import pandas as pd
+
+from functions.ledger import OutcomeLedger
+
+
+def ledger(tmp_path, **kwargs):
+    return OutcomeLedger(
+        paths={
+            "created": str(tmp_path / "created.csv"),
+            "failed": str(tmp_path / "failed.csv"),
+        },
+        columns={"created": ["uri", "name"], "failed": ["name", "error"]},
+        **kwargs
+    )
+
+
+def test_records_are_written_at_the_end(tmp_path):
+    outcomes = ledger(tmp_path)
+    outcomes.record("created", {"uri": "a", "name": "A", "extra": 1})
+    outcomes.record("failed", {"name": "B", "error": "409"})
+    assert not (tmp_path / "created.csv").exists()
+    outcomes.close()
+    created = pd.read_csv(tmp_path / "created.csv")
+    assert list(created.columns) == ["uri", "name", "extra"]
+    assert outcomes.counts == {"created": 1, "failed": 1}
+
+
+def test_streamed_records_are_appended(tmp_path):
+    outcomes = ledger(tmp_path, stream=True, keep_in_memory=False, flush_every=2)
+    for i in range(3):
+        outcomes.record("created", {"uri": str(i), "name": "n{}".format(i)})
+    # The first two are already written
+    assert len(pd.read_csv(tmp_path / "created.csv")) == 2
+    assert outcomes.frame("created")["uri"].tolist() == [0, 1, 2]
+    outcomes.close()
+    assert len(pd.read_csv(tmp_path / "failed.csv")) == 0
+
+
+def test_streamed_records_can_be_appended_to_a_previous_run(tmp_path):
+    outcomes = ledger(tmp_path, stream=True)
+    outcomes.record("failed", {"name": "A", "error": "400"})
+    outcomes.close()
+    outcomes = ledger(tmp_path, stream=True, append=True)
+    outcomes.record("failed", {"name": "B", "error": "400"})
+    outcomes.close()
+    assert pd.read_csv(tmp_path / "failed.csv")["name"].tolist() == ["A", "B"]
+    # The files that didn't exist get their header
+    assert list(pd.read_csv(tmp_path / "created.csv").columns) == ["uri", "name"]
@@ -0,0 +1,62 @@
+import threading
+import time
+
+import pytest
+
+from functions.utils import map_bounded
+
+
+def test_single_worker_keeps_the_order():
+    assert list(map_bounded(lambda x: x * 2, range(5))) == [0, 2, 4, 6, 8]
+
+
+def test_results_come_in_completion_order():
+    delays = {0: 0.2, 1: 0.0, 2: 0.1}
+
+    def work(item):
+        time.sleep(delays[item])
+        return item
+
+    results = list(map_bounded(work, [0, 1, 2], max_workers=3))
+    assert sorted(results) == [0, 1, 2]
+    assert results[0] == 1
+    assert results[-1] == 0
+
+
+def test_running_and_read_ahead_items_are_bounded():
+    lock = threading.Lock()
+    state = {"running": 0, "max_running": 0, "read": 0, "done": 0, "max_ahead": 0}
+
+    def items():
+        for i in range(40):
+            with lock:
+                state["read"] += 1
+                state["max_ahead"] = max(state["max_ahead"], state["read"] - state["done"])
+            yield i
+
+    def work(item):
+        with lock:
+            state["running"] += 1
+            state["max_running"] = max(state["max_running"], state["running"])
+        time.sleep(0.005)
+        with lock:
+            state["running"] -= 1
+            state["done"] += 1
+        return item
+
+    assert sorted(map_bounded(work, items(), max_workers=3)) == list(range(40))
+    assert state["max_running"] <= 3
+    # At most twice max_workers items are read before being processed
+    assert state["max_ahead"] <= 2 * 3 + 1
+
+
+def test_worker_error_is_raised():
+    def work(item):
+        if item == 3:
+            raise ValueError("bad item")
+        return item
+
+    with pytest.raises(ValueError, match="bad item"):
+        list(map_bounded(work, range(10), max_workers=2))
+    with pytest.raises(ValueError, match="bad item"):
+        list(map_bounded(work, range(10)))
@@ -0,0 +1,67 @@
+import threading
+
+import pandas as pd
+import pytest
+
+opensilexClientToolsPython = pytest.importorskip("opensilexClientToolsPython")
+
+from functions.journal import ImportJournal
+from functions.objects import create_update_objects
+
+
+class FakeObjectsApi:
+    """ScientificObjectsApi refusing the objects named "dup" as existing"""
+
+    def __init__(self, python_client):
+        self.lock = threading.Lock()
+        self.created = []
+
+    def create_scientific_object(self, body):
+        if body.name == "dup":
+            raise Exception("(409) Reason: Object already exists")
+        with self.lock:
+            self.created.append(body.name)
+        return {"result": ["os:" + body.name]}
+
+
+@pytest.fixture
+def objects_api(monkeypatch):
+    api = FakeObjectsApi(None)
+    monkeypatch.setattr(
+        opensilexClientToolsPython, "ScientificObjectsApi", lambda python_client: api
+    )
+    return api
+
+
+def objects():
+    return pd.DataFrame({
+        "uri": [None, None, None, None],
+        "type": ["vocabulary:Plant", "vocabulary:Plant", None, "vocabulary:Plant"],
+        "name": ["a", "dup", "no type", None],
+        "experimentUri": "expe:1",
+    })
+
+
+@pytest.mark.parametrize("max_workers", [1, 3])
+def test_failing_rows_dont_stop_the_import(objects_api, max_workers):
+    report = create_update_objects(
+        opensilexClientToolsPython.ApiClient(), objects(), False,
+        max_workers=max_workers
+    )
+    assert report["status"].tolist() == ["created", "existed", "failed", "failed"]
+    assert report.loc[0, "uri"] == "os:a"
+    assert "type" in report.loc[2, "error"]
+    assert objects_api.created == ["a"]
+
+
+def test_journal_skips_the_done_rows(objects_api, tmp_path):
+    journal = ImportJournal(str(tmp_path / "journal.sqlite"))
+    client = opensilexClientToolsPython.ApiClient()
+    create_update_objects(client, objects(), False, journal=journal, source="objects")
+    report = create_update_objects(
+        client, objects(), False, journal=journal, source="objects"
+    )
+    journal.close()
+    # The failed rows are retried, the others are skipped
+    assert report["status"].tolist() == ["skipped", "skipped", "failed", "failed"]
+    assert objects_api.created == ["a"]
@@ -0,0 +1,115 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("opensilexClientToolsPython")
+
+from functions.plans import ImportPlan
+
+
+def plan(**kwargs):
+    return ImportPlan.from_records([
+        {"kind": "unit", "row": 0, "uri": None, "name": "m", "action": "create", "requests": 2},
+        {"kind": "unit", "row": 1, "uri": "unit:1", "name": "s", "action": "skip", "requests": 0},
+        {"kind": "variable", "row": 0, "uri": "var:1", "name": "v", "action": "update", "requests": 1},
+    ], **kwargs)
+
+
+def test_requests_and_actions():
+    import_plan = plan()
+    assert import_plan.requests == 3
+    assert import_plan.action("unit", 1) == "skip"
+    assert import_plan.action("unit", 5) is None
+    assert import_plan.counts().loc["unit", "create"] == 1
+
+
+def test_estimate_from_the_snapshot(monkeypatch):
+    import_plan = plan(snapshot_requests=4, snapshot_seconds=2.0)
+    monkeypatch.setattr(
+        "functions.plans.metrics.summary", lambda: {"api": {}}
+    )
+    assert import_plan.seconds_per_request() == 0.5
+    assert import_plan.estimate_seconds(max_workers=3) == pytest.approx(0.5)
+    assert "3 requests" in import_plan.describe()
+
+
+class FakeObjectsApi:
+    """ScientificObjectsApi searching and updating the objects in memory"""
+
+    def __init__(self, objects):
+        self.objects = {o.uri: o for o in objects}
+        self.updated = []
+
+    def search_scientific_objects(self, experiment, page=0, page_size=20):
+        found = list(self.objects.values())
+        return {
+            "result": found[page * page_size:(page + 1) * page_size],
+            "metadata": {"pagination": {"totalCount": len(found)}},
+        }
+
+    def update_scientific_object(self, body):
+        self.updated.append(body.uri)
+        return {"result": [body.uri]}
+
+
+def test_unchanged_objects_are_skipped_in_update_mode(monkeypatch):
+    client_module = pytest.importorskip("opensilexClientToolsPython")
+    from conftest import FakeObject
+    from functions.objects import create_update_objects, plan_objects
+
+    api = FakeObjectsApi([
+        FakeObject(uri="os:1", name="plant 1", rdf_type="vocabulary:Plant"),
+        FakeObject(uri="os:2", name="plant 2", rdf_type="vocabulary:Plant"),
+    ])
+    monkeypatch.setattr(client_module, "ScientificObjectsApi", lambda python_client: api)
+    objects = pd.DataFrame({
+        "uri": ["os:1", "os:2", "os:3"],
+        "type": "vocabulary:Plant",
+        "name": ["plant 1", "renamed", "plant 3"],
+        "experimentUri": "expe:1",
+    })
+    client = client_module.ApiClient()
+
+    import_plan = plan_objects(client, objects, True)
+    assert import_plan.actions["action"].tolist() == ["skip", "update", "fail"]
+    assert import_plan.requests == 1
+
+    report = create_update_objects(client, objects, True, plan=import_plan)
+    assert report["status"].tolist() == ["existed", "updated", "failed"]
+    assert api.updated == ["os:2"]
+
+
+def test_migrate_variables_follows_the_plan(variables_api, tmp_path, monkeypatch):
+    client_module = pytest.importorskip("opensilexClientToolsPython")
+    from functions.variables import migrate_variables, plan_variables
+
+    monkeypatch.chdir(tmp_path)
+    variables_api.add("entity", uri="entity:plant", name="Plant")
+    schema = {
+        "entity": {"name": "entity.label"},
+        "name": "variable.label",
+        "datatype": "variable.datatype",
+    }
+    variables = pd.DataFrame({
+        "entity.label": ["Plant", "Leaf"],
+        "variable.label": ["plant height", "leaf height"],
+        "variable.datatype": "decimal",
+    })
+    client = client_module.ApiClient()
+
+    import_plan = plan_variables(client, variables, schema)
+    entities = import_plan.actions["kind"] == "entity"
+    assert import_plan.actions.loc[entities, "action"].tolist() == ["skip", "create"]
+    # The leaf is planned to fail, so it isn't created when applying
+    import_plan.actions.loc[entities & (import_plan.actions["row"] == 1), "action"] = "fail"
+    searches = sum(count for call, count in variables_api.calls.items() if call.startswith("search"))
+
+    created = migrate_variables(client, variables, schema, plan=import_plan)
+
+    calls = variables_api.calls
+    assert sum(count for call, count in calls.items() if call.startswith("search")) == searches
+    assert calls["create_entity"] == 0
+    assert calls["create_variable"] == 1
+    assert created["name"].tolist() == ["plant height"]
+    assert variables_api.objects["variable"]["gen:variable/plant height"].entity == "entity:plant"
+    assert pd.read_csv("already_existed.csv")["uri"].tolist() == ["entity:plant"]
+    assert "Leaf" in pd.read_csv("failed.csv").to_string()
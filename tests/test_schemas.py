@@ -0,0 +1,58 @@
+import os
+
+import pandas as pd
+import pytest
+
+from functions.schemas import DEFAULT_VARIABLES_SCHEMA, VariablesSchema
+
+schema = {
+    "entity": {"name": "entity.label", "uri": "entity.uri"},
+    "unit": {"name": "unit.label", "uri": "entity.uri"},
+    "name": "variable.label",
+    "datatype": "variable.datatype",
+}
+
+
+def sheet():
+    return pd.DataFrame({
+        "variable.datatype": ["decimal"],
+        "entity.label": ["Plant"],
+        "entity.uri": ["entity:plant"],
+        "unit.label": ["centimeter"],
+        "variable.label": ["height"],
+        "other": ["ignored"],
+    })
+
+
+def test_compile():
+    compiled = VariablesSchema.compile(schema)
+    assert VariablesSchema.compile(compiled) is compiled
+    assert compiled.keys() == ["entity", "unit", "name", "datatype"]
+    assert compiled.fields == {"name": "variable.label", "datatype": "variable.datatype"}
+    assert list(compiled.components) == ["entity", "unit"]
+
+
+def test_apply_maps_the_columns():
+    applied = VariablesSchema.compile(schema).apply(sheet())
+    assert list(applied["entity"].columns) == ["name", "uri"]
+    assert applied["entity"].iloc[0].tolist() == ["Plant", "entity:plant"]
+    # A column can be used by several attributes
+    assert applied["unit"].iloc[0].tolist() == ["centimeter", "entity:plant"]
+    assert applied[("name", "")].tolist() == ["height"]
+    assert applied[("datatype", "")].tolist() == ["decimal"]
+    assert "other" not in applied.columns.get_level_values(0)
+
+
+def test_missing_columns_are_rejected():
+    with pytest.raises(ValueError, match="unit.label"):
+        VariablesSchema.compile(schema).apply(sheet().drop(columns=["unit.label"]))
+
+
+def test_default_schema_matches_the_example_sheet():
+    path = os.path.join(
+        os.path.dirname(__file__), "..", "csv_example", "extended_variables_testing.csv"
+    )
+    variables = pd.read_csv(path, sep=";")
+    applied = VariablesSchema.compile(DEFAULT_VARIABLES_SCHEMA).apply(variables)
+    assert len(applied) == len(variables)
+    assert set(applied.columns.get_level_values(0)) == set(DEFAULT_VARIABLES_SCHEMA)
@@ -0,0 +1,90 @@
+import pytest
+
+opensilexClientToolsPython = pytest.importorskip("opensilexClientToolsPython")
+
+from functions.clients import SessionManager
+
+
+class Unauthorized(Exception):
+    status = 401
+
+
+class FakeConfiguration:
+    host = "http://opensilex"
+
+
+class FakeClient:
+    """Client answering 401 to the requests sent with an expired token"""
+
+    def __init__(self, token, valid_tokens):
+        self.configuration = FakeConfiguration()
+        self.default_headers = {"Authorization": token}
+        self.valid_tokens = valid_tokens
+        self.requests = []
+
+    def set_default_header(self, name, value):
+        self.default_headers[name] = value
+
+    def call_api(self, *args, **kwargs):
+        token = self.default_headers["Authorization"]
+        self.requests.append(token)
+        if token not in self.valid_tokens:
+            raise Unauthorized("(401) Reason: Unauthorized")
+        return {"result": []}
+
+
+@pytest.fixture
+def logins(monkeypatch):
+    """Replace the authentication by a counter of the logins"""
+    logins = []
+
+    class AuthClient:
+        def __init__(self, configuration=None):
+            self.default_headers = {}
+
+        def connect_to_opensilex_ws(self, identifier, password, host):
+            logins.append((identifier, host))
+            self.default_headers["Authorization"] = "Bearer token-{}".format(len(logins))
+
+    monkeypatch.setattr(opensilexClientToolsPython, "ApiClient", AuthClient)
+    return logins
+
+
+def test_unauthorized_request_is_sent_again_with_a_new_token(logins):
+    client = FakeClient("Bearer expired", valid_tokens={"Bearer token-1"})
+    SessionManager(client, "user", "password")
+    assert client.call_api("/data", "GET") == {"result": []}
+    assert logins == [("user", "http://opensilex")]
+    assert client.requests == ["Bearer expired", "Bearer token-1"]
+
+
+def test_second_unauthorized_is_raised(logins):
+    client = FakeClient("Bearer expired", valid_tokens=set())
+    SessionManager(client, "user", "password")
+    with pytest.raises(Unauthorized):
+        client.call_api("/data", "GET")
+    # Only one new login and one retry
+    assert len(logins) == 1
+    assert client.requests == ["Bearer expired", "Bearer token-1"]
+
+
+def test_other_errors_are_not_retried(logins):
+    client = FakeClient("Bearer token", valid_tokens={"Bearer token"})
+
+    def failing(*args, **kwargs):
+        raise ConnectionError("unreachable")
+
+    client.call_api = failing
+    SessionManager(client, "user", "password")
+    with pytest.raises(ConnectionError):
+        client.call_api("/data", "GET")
+    assert logins == []
+
+
+def test_token_replaced_by_another_thread_is_kept(logins):
+    client = FakeClient("Bearer expired", valid_tokens={"Bearer token-1"})
+    session = SessionManager(client, "user", "password")
+    session.refresh()
+    # A request that failed with the old token doesn't log in again
+    assert session.refresh(expired_token="Bearer expired") == "Bearer token-1"
+    assert len(logins) == 1
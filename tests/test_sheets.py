@@ -0,0 +1,77 @@
+import http.server
+import threading
+
+import pytest
+import requests
+
+from functions.sheets import download_sheet, fetch_sheet
+
+
+class SheetServer(http.server.HTTPServer):
+    """Local server answering with the status and csv it is given"""
+
+    status = 200
+    content = b"a,b\n1,2\n"
+
+
+class SheetHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        if server.status == 200 and self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(server.status)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(server.content)))
+        self.end_headers()
+        self.wfile.write(server.content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = SheetServer(("127.0.0.1", 0), SheetHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def sheet_url(server):
+    return "http://127.0.0.1:{}/sheet".format(server.server_address[1])
+
+
+def test_cached_sheet_is_reused_when_not_modified(server, tmp_path):
+    path = download_sheet(sheet_url(server), cache_dir=str(tmp_path))
+    server.content = b"changed"
+    assert download_sheet(sheet_url(server), cache_dir=str(tmp_path)) == path
+    with open(path, "rb") as f:
+        assert f.read() == b"a,b\n1,2\n"
+
+
+def test_error_status_is_raised_despite_a_cached_copy(server, tmp_path):
+    download_sheet(sheet_url(server), cache_dir=str(tmp_path))
+    server.status = 403
+    with pytest.raises(requests.HTTPError):
+        download_sheet(sheet_url(server), cache_dir=str(tmp_path))
+
+
+def test_cached_copy_is_used_when_the_server_is_unreachable(server, tmp_path):
+    url = sheet_url(server)
+    path = download_sheet(url, cache_dir=str(tmp_path))
+    server.shutdown()
+    server.server_close()
+    assert download_sheet(url, cache_dir=str(tmp_path), timeout=5) == path
+
+
+def test_fetched_sheet_is_not_cached(server, tmp_path, monkeypatch):
+    monkeypatch.setattr("functions.sheets.sheet_cache_dir", str(tmp_path))
+    assert fetch_sheet(sheet_url(server)) == b"a,b\n1,2\n"
+    assert list(tmp_path.iterdir()) == []
+    server.status = 404
+    with pytest.raises(requests.HTTPError):
+        fetch_sheet(sheet_url(server))
@@ -0,0 +1,36 @@
+from functions.utils import is_last_page, page_count
+
+
+def page(results, **pagination):
+    return {"result": results, "metadata": {"pagination": pagination}}
+
+
+def test_page_count_from_total_pages():
+    assert page_count(page([], totalPages=3, totalCount=50), 20) == 3
+
+
+def test_page_count_from_total_count():
+    assert page_count(page([], totalCount=41, pageSize=20), 100) == 3
+    assert page_count(page([], totalCount=40), 20) == 2
+    assert page_count(page([], totalCount=0), 20) == 0
+
+
+def test_page_count_without_metadata():
+    assert page_count({"result": []}, 20) is None
+    assert page_count(page([], pageSize=20, currentPage=0), 20) is None
+
+
+def test_full_page_before_the_last_is_not_last():
+    response = page([0] * 20, totalCount=40)
+    assert not is_last_page(response, 0, 20)
+    assert is_last_page(response, 1, 20)
+
+
+def test_short_page_is_not_last_if_more_are_counted():
+    # The server may return less than page_size objects before the end
+    assert not is_last_page(page([0] * 15, totalCount=40), 0, 20)
+
+
+def test_short_page_is_last_without_metadata():
+    assert is_last_page({"result": [0] * 15}, 0, 20)
+    assert not is_last_page({"result": [0] * 20}, 0, 20)
@@ -0,0 +1,101 @@
+import threading
+
+import pytest
+
+opensilexClientToolsPython = pytest.importorskip("opensilexClientToolsPython")
+
+from functions.variables import VariablesLookupCache
+
+
+@pytest.fixture
+def cache(variables_api):
+    variables_api.add("entity", uri="entity:plant", name="Plant")
+    variables_api.add("entity", uri="entity:leaf", name="Leaf")
+    variables_api.add("unit", uri="unit:cm", name="centimeter")
+    return VariablesLookupCache(opensilexClientToolsPython.ApiClient(), page_size=1)
+
+
+def test_hits_and_misses(cache, variables_api):
+    assert cache.find_by_name("entity", " plant ")["uri"] == "entity:plant"
+    assert cache.find_by_uri("entity", "entity:leaf")["name"] == "Leaf"
+    assert cache.find_by_name("entity", "Root") is None
+    assert cache.find_by_uri("entity", "entity:root") is None
+    # Loaded once, one request per page
+    assert variables_api.calls["search_entities"] == 2
+    assert cache.requests == 2
+
+
+def test_added_objects_are_found(cache, variables_api):
+    cache.add("entity", {"uri": "entity:root", "name": "Root"})
+    assert cache.find_by_name("entity", "root")["uri"] == "entity:root"
+    # An object with a name already indexed doesn't replace it
+    cache.add("entity", {"uri": "entity:plant2", "name": "plant"})
+    assert cache.find_by_name("entity", "Plant")["uri"] == "entity:plant"
+
+
+def test_details_are_fetched_once(cache, variables_api):
+    assert cache.get_details("unit", "unit:cm")["name"] == "centimeter"
+    assert cache.get_details("unit", "unit:cm")["name"] == "centimeter"
+    assert variables_api.calls["get_unit"] == 1
+    # get_details doesn't load the subtype
+    assert variables_api.calls["search_units"] == 0
+    with pytest.raises(Exception, match="404"):
+        cache.get_details("unit", "unit:mm")
+
+
+def test_threads_load_a_subtype_once(cache, variables_api):
+    results = []
+
+    def lookup():
+        results.append(cache.find_by_name("entity", "leaf")["uri"])
+
+    threads = [threading.Thread(target=lookup) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["entity:leaf"] * 8
+    assert variables_api.calls["search_entities"] == 2
+
+
+def test_lookups_dont_wait_for_another_subtype_loading(cache, variables_api):
+    searching, release = threading.Event(), threading.Event()
+    search_entities = variables_api.search_entities
+
+    def slow_search(**kwargs):
+        searching.set()
+        release.wait(5)
+        return search_entities(**kwargs)
+
+    cache.search_func["entity"] = slow_search
+    loader = threading.Thread(target=cache.load, args=("entity",))
+    loader.start()
+    found = {}
+
+    def lookups():
+        found["unit"] = cache.find_by_name("unit", "centimeter")["uri"]
+        found["details"] = cache.get_details("entity", "entity:plant")["name"]
+
+    try:
+        assert searching.wait(5)
+        # Neither the other subtypes nor the details wait for the entities
+        other = threading.Thread(target=lookups)
+        other.start()
+        other.join(2)
+        assert found == {"unit": "unit:cm", "details": "Plant"}
+    finally:
+        release.set()
+        loader.join()
+    assert cache.find_by_name("entity", "plant")["uri"] == "entity:plant"
+
+
+def test_failed_load_is_retried(cache, variables_api):
+    def failing_search(**kwargs):
+        raise ConnectionError("unreachable")
+
+    search_units = cache.search_func["unit"]
+    cache.search_func["unit"] = failing_search
+    with pytest.raises(ConnectionError):
+        cache.find_by_name("unit", "centimeter")
+    cache.search_func["unit"] = search_units
+    assert cache.find_by_name("unit", "centimeter")["uri"] == "unit:cm"
@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+
+opensilexClientToolsPython = pytest.importorskip("opensilexClientToolsPython")
+
+from conftest import FakeObject
+from functions.variables import get_variables
+
+schema = {
+    "entity": {"name": "entity.label", "uri": "entity.uri"},
+    "unit": {"name": "unit.label", "uri": "unit.uri"},
+    "uri": "variable.uri",
+    "name": "variable.label",
+}
+
+
+def test_shared_components_are_fetched_once(variables_api, tmp_path):
+    variables_api.add("entity", uri="entity:plant", name="Plant")
+    variables_api.add("entity", uri="entity:leaf", name="Leaf")
+    variables_api.add("unit", uri="unit:cm", name="centimeter")
+    entities = ["entity:plant", "entity:leaf", "entity:plant", "entity:plant", "entity:leaf"]
+    for i, entity in enumerate(entities):
+        variables_api.add(
+            "variable", uri="var:{}".format(i), name="variable {}".format(i),
+            entity=FakeObject(uri=entity), unit=FakeObject(uri="unit:cm")
+        )
+
+    path = str(tmp_path / "variables.csv")
+    exported = get_variables(
+        opensilexClientToolsPython.ApiClient(), csv_path=path, page_size=2,
+        variables_schema=schema
+    )
+
+    assert variables_api.calls["get_entity"] == 2
+    assert variables_api.calls["get_unit"] == 1
+    assert exported["entity.label"].tolist() == ["Plant", "Leaf", "Plant", "Plant", "Leaf"]
+    assert exported["unit.label"].tolist() == ["centimeter"] * 5
+    assert pd.read_csv(path)["entity.uri"].tolist() == entities
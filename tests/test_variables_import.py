@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+opensilexClientToolsPython = pytest.importorskip("opensilexClientToolsPython")
+
+from functions.variables import migrate_variables
+
+schema = {
+    "entity": {"name": "entity.label", "uri": "entity.uri"},
+    "characteristic": {"name": "characteristic.label", "uri": "characteristic.uri"},
+    "method": {"name": "method.label", "uri": "method.uri"},
+    "unit": {"name": "unit.label", "uri": "unit.uri"},
+    "uri": "variable.uri",
+    "name": "variable.label",
+    "datatype": "variable.datatype",
+}
+
+
+def variables(entities):
+    rows = len(entities)
+    return pd.DataFrame({
+        "entity.label": entities,
+        "entity.uri": None,
+        "characteristic.label": "Height",
+        "characteristic.uri": None,
+        "method.label": "Ruler",
+        "method.uri": None,
+        "unit.label": "centimeter",
+        "unit.uri": None,
+        "variable.uri": None,
+        "variable.label": ["variable {}".format(i) for i in range(rows)],
+        "variable.datatype": "decimal",
+    }).astype(object).where(lambda df: df.notna(), None)
+
+
+def test_duplicate_components_are_created_once(variables_api, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    entities = ["Plant", "Leaf", "Plant", "Plant", "Leaf"]
+    migrate_variables(opensilexClientToolsPython.ApiClient(), variables(entities), schema)
+
+    calls = variables_api.calls
+    assert calls["create_entity"] == 2
+    assert calls["create_characteristic"] == 1
+    assert calls["create_method"] == 1
+    assert calls["create_unit"] == 1
+    assert calls["create_variable"] == len(entities)
+
+    # Every variable references the entity of its row
+    entity_uris = {o.name: uri for uri, o in variables_api.objects["entity"].items()}
+    for i, entity in enumerate(entities):
+        variable = variables_api.objects["variable"]["gen:variable/variable {}".format(i)]
+        assert variable.entity == entity_uris[entity]
+        assert variable.datatype == "http://www.w3.org/2001/XMLSchema#decimal"
+
+
+def test_existing_components_are_reused(variables_api, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    variables_api.add("entity", uri="entity:plant", name="plant")
+    migrate_variables(
+        opensilexClientToolsPython.ApiClient(), variables(["Plant", "Leaf"]), schema
+    )
+    assert variables_api.calls["create_entity"] == 1
+    assert variables_api.objects["variable"]["gen:variable/variable 0"].entity == "entity:plant"
+    assert len(pd.read_csv("already_existed.csv")) == 1
@@ -0,0 +1,24 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("opensilexClientToolsPython")
+
+from functions.variables import changed_fields
+
+
+def test_numbers_written_differently_are_unchanged():
+    row = pd.Series({"uri": "unit:1", "name": "meter ", "symbol": "1", "alternative_symbol": 1.0})
+    current = {"uri": "unit:1", "name": "meter", "symbol": "1.0", "alternative_symbol": "1"}
+    assert changed_fields(row, current) == {}
+
+
+def test_changed_values_are_returned():
+    row = pd.Series({"name": "metre", "symbol": "2", "comment": None})
+    current = {"name": "meter", "symbol": "1.0", "comment": "length"}
+    assert changed_fields(row, current) == {"name": "metre", "symbol": "2"}
+
+
+def test_referenced_objects_are_compared_by_uri():
+    row = pd.Series({"entity": "entity:1", "unit": "unit:2"})
+    current = {"entity": {"uri": "entity:1"}, "unit": {"uri": "unit:1"}}
+    assert changed_fields(row, current) == {"unit": "unit:2"}